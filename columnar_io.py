@@ -0,0 +1,313 @@
+"""
+Created by: Philip P
+Created on: Mon 19 Oct 2026
+
+Columnar (Arrow/Parquet) batch input and output for NB36 credit decisions
+- Applications are read as Arrow record batches, with the credit bureau report as
+  a nested struct column (tradelines and risk model as lists of structs)
+- Decision inputs are extracted with Arrow compute kernels and decided with the
+  vectorised DecisionEngine.decide_columns, no per-row Python dicts are built
+- Decisions (flags, check values, outcome, limit) are emitted as Arrow record
+  batches, and can be streamed straight to Parquet
+- Applications with missing or malformed fields get a per-row error message
+  and a null outcome, so one bad row never fails a batch or a file
+
+Example usage:
+    python columnar_io.py applications.parquet decisions.parquet --batch-size 65536
+"""
+# built in imports
+import argparse
+import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# third party imports
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# local imports
+from decision_engine import FLAG_CHECKS, DecisionEngine, dates_from_parts
+
+DEFAULT_BATCH_SIZE = 65536
+
+_NAME_TYPE = pa.struct([
+    ('firstName', pa.string()),
+    ('middleName', pa.string()),
+    ('surname', pa.string()),
+    ])
+_TRADELINE_TYPE = pa.struct([
+    ('accountType', pa.string()),
+    ('amount1', pa.string()),
+    ('amount1Qualifier', pa.string()),
+    ('amount2', pa.string()),
+    ('amount2Qualifier', pa.string()),
+    ('balanceAmount', pa.string()),
+    ('balanceDate', pa.string()),
+    ('delinquencies30Days', pa.string()),
+    ('delinquencies60Days', pa.string()),
+    ('delinquencies90to180Days', pa.string()),
+    ('openOrClosed', pa.string()),
+    ])
+CREDIT_BUREAU_REPORT_TYPE = pa.struct([
+    ('consumerIdentity', pa.struct([
+        ('name', pa.list_(_NAME_TYPE)),
+        ('date_of_birth', pa.struct([
+            ('day', pa.int32()),
+            ('month', pa.int32()),
+            ('year', pa.int32()),
+            ])),
+        ])),
+    ('riskModel', pa.list_(pa.struct([('credit_score', pa.string())]))),
+    ('tradeline', pa.list_(_TRADELINE_TYPE)),
+    ])
+
+# applications, as the payloads of run_customer_credit_check
+APPLICATION_SCHEMA = pa.schema([
+    ('application_id', pa.int64()),
+    ('credit_bureau_report', CREDIT_BUREAU_REPORT_TYPE),
+    ('NB36_risk_score', pa.float64()),
+    ])
+
+# decisions, one flat row per application - the check values follow the
+# 'check_outcome' of run_customer_credit_check, credit_limit is null when none is given.
+# Applications that cannot be decided (missing or malformed fields) get an 'error'
+# message and null flags, check values and outcome, instead of failing the batch
+DECISION_SCHEMA = pa.schema([
+    ('application_id', pa.int64()),
+    *[(name, pa.bool_()) for name in FLAG_CHECKS],
+    ('delinquencies_last_30_days', pa.float64()),
+    ('age', pa.int64()),
+    ('credit_score', pa.float64()),
+    ('internal_risk_score', pa.float64()),
+    ('knockout_result', pa.string()),
+    ('credit_limit', pa.float64()),
+    ('error', pa.string()),
+    ])
+
+_NUMBER_PATTERN = r'^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?$'
+
+
+def applications_to_table(
+        payloads: List[dict]
+        ) -> pa.Table:
+    """Helper function to convert application payload dicts to an Arrow table, e.g. to write test data"""
+    return pa.Table.from_pylist(payloads, schema=APPLICATION_SCHEMA)
+
+
+def _field(
+        array: pa.Array,
+        name: str
+        ) -> pa.Array:
+    """Helper function to read a struct field, null where the struct itself is null"""
+    return array.flatten()[array.type.get_field_index(name)]
+
+
+def _parse_floats(
+        array: pa.Array
+        ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Helper function to parse a string (or numeric) column to floats, without failing on bad values
+
+    Returns:
+        np.ndarray: Values, NaN where missing or malformed
+        np.ndarray: True where a value is present but is not a number
+    """
+    if not pa.types.is_string(array.type):
+        values = pc.cast(array, pa.float64())
+        return pc.fill_null(values, np.nan).to_numpy(zero_copy_only=False), np.zeros(len(array), dtype=bool)
+
+    array = pc.utf8_trim_whitespace(array)
+    is_number = pc.fill_null(pc.match_substring_regex(array, _NUMBER_PATTERN), False)
+    is_malformed = pc.and_(pc.invert(is_number), pc.not_equal(array, ''))
+    values = pc.cast(pc.if_else(is_number, array, pa.scalar(None, pa.string())), pa.float64())
+
+    return (
+        pc.fill_null(values, np.nan).to_numpy(zero_copy_only=False),
+        pc.fill_null(is_malformed, False).to_numpy(zero_copy_only=False),
+        )
+
+
+def _first_elements(
+        lists: pa.Array
+        ) -> Tuple[pa.Array, np.ndarray]:
+    """
+    Helper function to take the first element of every list, as list_element(lists, 0)
+    does, without failing on null or empty lists
+
+    Returns:
+        pa.Array: First elements of the non-empty lists
+        np.ndarray: Row index of each of them
+    """
+    rows, first = np.unique(pc.list_parent_indices(lists).to_numpy(zero_copy_only=False), return_index=True)
+
+    return lists.flatten().take(pa.array(first, type=pa.int64())), rows
+
+
+def _report_errors(
+        num_rows: int,
+        checks: List[Tuple[np.ndarray, str]]
+        ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Helper function to build the per-row error messages, the first failed check of each row
+
+    Returns:
+        np.ndarray: Error messages, None where every check passed
+        np.ndarray: True where a check failed
+    """
+    errors = np.full(num_rows, None, dtype=object)
+    for failed, message in reversed(checks):
+        errors[failed] = message
+
+    return errors, np.logical_or.reduce([failed for failed, _ in checks])
+
+
+def decide_record_batch(
+        batch: Union[pa.RecordBatch, pa.Table],
+        engine: Optional[DecisionEngine] = None,
+        as_of: Optional[datetime.date] = None
+        ) -> pa.RecordBatch:
+    """
+    Decide a record batch of applications (see APPLICATION_SCHEMA). Applications
+    that cannot be decided, e.g. without a credit score or with an invalid date of
+    birth, are returned with an 'error' message and a null outcome, see DECISION_SCHEMA.
+
+    Args:
+        batch: Applications, with at least the columns of APPLICATION_SCHEMA
+        engine: Decision engine, a default DecisionEngine if None
+        as_of: Date at which customer ages are computed, defaults to today
+
+    Returns:
+        pa.RecordBatch: Decisions, see DECISION_SCHEMA
+    """
+    if isinstance(batch, pa.Table):
+        batch = batch.combine_chunks().to_batches()[0] if batch.num_rows else \
+            pa.RecordBatch.from_pylist([], schema=batch.schema)
+    engine = engine or DecisionEngine(registry=None)
+    num_rows = batch.num_rows
+
+    report = batch.column(batch.schema.get_field_index('credit_bureau_report'))
+    no_report = report.is_null().to_numpy(zero_copy_only=False)
+
+    # Rule 1: total delinquencies over all tradelines, missing fields and empty strings count as zero
+    tradelines = _field(report, 'tradeline')
+    delinquencies, malformed = _parse_floats(_field(tradelines.flatten(), 'delinquencies30Days'))
+    parents = pc.list_parent_indices(tradelines).to_numpy(zero_copy_only=False)
+    num_delinquencies = np.bincount(parents, weights=np.nan_to_num(delinquencies, nan=0.0), minlength=num_rows)
+    malformed_delinquencies = np.bincount(parents, weights=malformed, minlength=num_rows) > 0
+    no_tradelines = tradelines.is_null().to_numpy(zero_copy_only=False)
+
+    # Rule 2: date of birth, NaT where missing or invalid
+    date_of_birth = _field(_field(report, 'consumerIdentity'), 'date_of_birth')
+    parts = [pc.fill_null(_field(date_of_birth, part), 0).to_numpy(zero_copy_only=False)
+             for part in ('year', 'month', 'day')]
+    dates_of_birth = dates_from_parts(*parts, errors='coerce')
+    missing_date_parts = np.logical_or.reduce(
+        [_field(date_of_birth, part).is_null().to_numpy(zero_copy_only=False) for part in ('year', 'month', 'day')]
+        )
+
+    # Rule 3 and 4: credit score (of the first risk model) and internal risk score
+    first_risk_models, rows = _first_elements(_field(report, 'riskModel'))
+    first_credit_scores, malformed_first = _parse_floats(_field(first_risk_models, 'credit_score'))
+    credit_scores = np.full(num_rows, np.nan)
+    credit_scores[rows] = first_credit_scores
+    malformed_credit_scores = np.zeros(num_rows, dtype=bool)
+    malformed_credit_scores[rows] = malformed_first
+    internal_risk_scores, malformed_risk_scores = _parse_floats(
+        batch.column(batch.schema.get_field_index('NB36_risk_score'))
+        )
+
+    errors, failed = _report_errors(num_rows=num_rows, checks=[
+        (no_report, "credit_bureau_report is missing"),
+        (no_tradelines, "tradeline is missing"),
+        (malformed_delinquencies, "tradeline.delinquencies30Days is not a number"),
+        (missing_date_parts, "date_of_birth is missing"),
+        (np.isnat(dates_of_birth), "date_of_birth is not a valid date"),
+        (malformed_credit_scores, "riskModel.credit_score is not a number"),
+        (np.isnan(credit_scores), "riskModel.credit_score is missing"),
+        (malformed_risk_scores, "NB36_risk_score is not a number"),
+        (np.isnan(internal_risk_scores), "NB36_risk_score is missing"),
+        ])
+    # rows that failed are decided on placeholder inputs and masked out of the result
+    dates_of_birth[failed] = np.datetime64('1970-01-01')
+    columns = engine.decide_columns(
+        num_delinquencies=np.where(failed, 0.0, num_delinquencies),
+        dates_of_birth=dates_of_birth,
+        credit_scores=np.where(failed, 0.0, credit_scores),
+        internal_risk_scores=np.where(failed, 0.0, internal_risk_scores),
+        as_of=as_of,
+        )
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pc.cast(batch.column(batch.schema.get_field_index('application_id')), pa.int64()),
+            *[pa.array(columns[name], type=pa.bool_(), mask=failed) for name in FLAG_CHECKS],
+            pa.array(num_delinquencies, type=pa.float64(), mask=failed),
+            pa.array(columns['age'], type=pa.int64(), mask=failed),
+            pa.array(credit_scores, type=pa.float64(), mask=failed),
+            pa.array(internal_risk_scores, type=pa.float64(), mask=failed),
+            pa.array(np.where(columns['is_accepted'], 'ACCEPT', 'REJECT'), type=pa.string(), mask=failed),
+            pa.array(columns['credit_limit'], type=pa.float64(), mask=failed | np.isnan(columns['credit_limit'])),
+            pa.array(errors, type=pa.string()),
+            ],
+        schema=DECISION_SCHEMA,
+        )
+
+
+def decide_record_batches(
+        batches: Iterable[pa.RecordBatch],
+        engine: Optional[DecisionEngine] = None,
+        as_of: Optional[datetime.date] = None
+        ) -> Iterator[pa.RecordBatch]:
+    """Lazily decide a stream of application record batches, see decide_record_batch"""
+    engine = engine or DecisionEngine(registry=None)
+    as_of = as_of or datetime.date.today()
+    for batch in batches:
+        yield decide_record_batch(batch=batch, engine=engine, as_of=as_of)
+
+
+def decide_parquet(
+        input_path: str,
+        output_path: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        engine: Optional[DecisionEngine] = None,
+        as_of: Optional[datetime.date] = None
+        ) -> int:
+    """
+    Stream applications from a Parquet file, decide them and write the decisions to Parquet,
+    holding at most batch_size applications in memory. Malformed applications never abort
+    the file, they are written with an 'error' message (see decide_record_batch)
+
+    Args:
+        input_path: Parquet file of applications (see APPLICATION_SCHEMA)
+        output_path: Parquet file to write the decisions to (see DECISION_SCHEMA)
+        batch_size: Number of applications per record batch
+        engine: Decision engine, a default DecisionEngine if None
+        as_of: Date at which customer ages are computed, defaults to today
+
+    Returns:
+        int: Number of applications written, including those with an error
+    """
+    parquet_file = pq.ParquetFile(input_path)
+    batches = parquet_file.iter_batches(
+        batch_size=batch_size, columns=['application_id', 'credit_bureau_report', 'NB36_risk_score']
+        )
+
+    num_decided = 0
+    with pq.ParquetWriter(output_path, DECISION_SCHEMA) as writer:
+        for decisions in decide_record_batches(batches, engine=engine, as_of=as_of):
+            writer.write_batch(decisions)
+            num_decided += decisions.num_rows
+
+    return num_decided
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Decide a Parquet file of applications")
+    parser.add_argument('input_path', help="Parquet file of applications")
+    parser.add_argument('output_path', help="Parquet file to write the decisions to")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    total = decide_parquet(input_path=args.input_path, output_path=args.output_path, batch_size=args.batch_size)
+    print(f"Decided {total} applications, written to {args.output_path}")
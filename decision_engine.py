@@ -0,0 +1,350 @@
+"""
+Created by: Philip P
+Created on: Mon 19 Oct 2026
+
+Reentrant NB36 credit decision engine, for serving decisions from a thread pool
+- Same rules and credit limit grid as run_customer_credit_check in submission.py
+- Never mutates the payload it is given and keeps no mutable state between calls,
+  so a single engine can be shared by many threads
+- Batches are decided with vectorised NumPy calls; columns of applications (e.g. from
+  Arrow/Parquet) can be decided on a thread pool, as the NumPy kernels release the GIL.
+  Dict payloads are decided on the calling thread, as reading them holds the GIL
+- Does not import pandas, to keep the memory footprint of a serving process small
+"""
+# built in imports
+import datetime
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# third party imports
+import numpy as np
+
+# local imports
+from latency_metrics import REGISTRY, DecisionLatencyRegistry
+
+FLAG_CHECKS = (
+    'has_delinquency_last_30_days',
+    'is_under_18',
+    'is_credit_score_fail',
+    'is_internal_risk_score_fail',
+    )
+
+# credit limit grid - rows are credit score bands, columns internal risk score bands,
+# bands are [lower, upper) and scores outside the grid get no credit limit (NaN)
+CREDIT_SCORE_BAND_EDGES = np.array([500, 600, 700, 800, 900])
+RISK_SCORE_BAND_EDGES = np.array([450, 500, 600, 700])
+CREDIT_LIMIT_GRID = np.array([
+    [2000, 2500, 3000],
+    [2500, 3500, 4500],
+    [3000, 5000, 7000],
+    [3500, 7000, 10000],
+    ], dtype=float)
+
+DAYS_IN_YEAR = 365.25  # account for leap years
+
+
+def dates_from_parts(
+        years: np.ndarray,
+        months: np.ndarray,
+        days: np.ndarray,
+        errors: str = 'raise'
+        ) -> np.ndarray:
+    """
+    Vectorised construction of datetime64[D] dates from year, month and day arrays
+
+    Args:
+        years: Years
+        months: Months, 1 to 12
+        days: Days of the month
+        errors: 'raise' to raise a ValueError on invalid dates (e.g. 31 February), as
+            datetime.date does, or 'coerce' to return NaT for them
+
+    Returns:
+        np.ndarray: Dates, datetime64[D]
+    """
+    years, months, days = (np.asarray(parts, dtype=np.int64) for parts in (years, months, days))
+    year_month = (years - 1970).astype('datetime64[Y]') + (months - 1).astype('timedelta64[M]')
+    dates = year_month.astype('datetime64[D]') + (days - 1).astype('timedelta64[D]')
+
+    # out of range days roll over into the next month, so check they survive the round trip
+    invalid = (months < 1) | (months > 12) | (days < 1) \
+        | (dates.astype('datetime64[M]') != year_month)
+    if invalid.any():
+        if errors == 'raise':
+            first = np.flatnonzero(invalid)[0]
+            raise ValueError(
+                f"{int(invalid.sum())} invalid date(s), e.g. year {years[first]} month {months[first]} day {days[first]}"
+                )
+        dates[invalid] = np.datetime64('NaT')
+
+    return dates
+
+
+def credit_limits(
+        credit_scores: np.ndarray,
+        internal_risk_scores: np.ndarray
+        ) -> np.ndarray:
+    """
+    Vectorised credit limit lookup, equivalent to submission.return_credit_limit
+
+    Args:
+        credit_scores: Customer credit scores
+        internal_risk_scores: Customer internal risk scores
+
+    Returns:
+        np.ndarray: Credit limits, NaN where the scores are outside the grid
+    """
+    credit_scores = np.trunc(np.asarray(credit_scores, dtype=float))
+    internal_risk_scores = np.trunc(np.asarray(internal_risk_scores, dtype=float))
+
+    row = np.searchsorted(CREDIT_SCORE_BAND_EDGES, credit_scores, side='right') - 1
+    col = np.searchsorted(RISK_SCORE_BAND_EDGES, internal_risk_scores, side='right') - 1
+    in_grid = (row >= 0) & (row < CREDIT_LIMIT_GRID.shape[0]) & (col >= 0) & (col < CREDIT_LIMIT_GRID.shape[1])
+
+    limits = np.full(credit_scores.shape, np.nan)
+    limits[in_grid] = CREDIT_LIMIT_GRID[row[in_grid], col[in_grid]]
+
+    return limits
+
+
+def extract_features(
+        customer_data_dict: dict
+        ) -> Tuple[float, int, int, int, float, float]:
+    """
+    Read the inputs of the decision rules from an application payload, without modifying it.
+    Tradelines without the 'delinquencies30Days' field count as zero delinquencies,
+    as in submission.has_delinquency_last_30_days.
+
+    Args:
+        customer_data_dict: Must include the keys ['application_id', 'credit_bureau_report', 'NB36_risk_score']
+
+    Returns:
+        tuple: (delinquencies in last 30 days, birth year, birth month, birth day, credit score, internal risk score)
+    """
+    report = customer_data_dict.get('credit_bureau_report')
+    if not report:
+        raise ValueError(
+            f"Credit bureau report doesn't exist, customer REJECTED, application ID: "
+            f"{customer_data_dict.get('application_id')}"
+            )
+
+    num_delinq = sum(float(tradeline.get('delinquencies30Days') or 0) for tradeline in report['tradeline'])
+    date_of_birth = report['consumerIdentity']['date_of_birth']
+
+    return (
+        num_delinq,
+        date_of_birth['year'],
+        date_of_birth['month'],
+        date_of_birth['day'],
+        float(report['riskModel'][0]['credit_score']),
+        float(customer_data_dict['NB36_risk_score']),
+        )
+
+
+class DecisionEngine:
+    """
+    Thread-safe, reentrant credit decision engine.
+
+    The thresholds are fixed at construction and every call works only on its
+    own local variables, so one engine can be shared by all threads of a process:
+
+        engine = DecisionEngine()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            decision = executor.submit(engine.decide, payload).result()
+
+    Decisions are returned as new dicts with the keys
+    ['application_id', 'flag_checks', 'check_outcome', 'knockout_result', 'credit_limit'].
+    """
+
+    __slots__ = ('_min_age', '_credit_score_threshold', '_risk_score_threshold', '_registry')
+
+    def __init__(
+            self,
+            min_age: float = 18,
+            credit_score_threshold: float = 500,
+            risk_score_threshold: float = 450,
+            registry: Optional[DecisionLatencyRegistry] = REGISTRY
+            ):
+        """
+        Args:
+            min_age: Customers younger than this fail the age check
+            credit_score_threshold: Customers with a credit score below this fail the credit score check
+            risk_score_threshold: Customers with an internal risk score below this fail the risk score check
+            registry: Latency registry recording every single decision, None to disable recording
+        """
+        self._min_age = min_age
+        self._credit_score_threshold = credit_score_threshold
+        self._risk_score_threshold = risk_score_threshold
+        self._registry = registry
+
+    def decide_columns(
+            self,
+            num_delinquencies: np.ndarray,
+            dates_of_birth: np.ndarray,
+            credit_scores: np.ndarray,
+            internal_risk_scores: np.ndarray,
+            as_of: Optional[datetime.date] = None
+            ) -> Dict[str, np.ndarray]:
+        """
+        Vectorised decision rules over columns of applications
+
+        Args:
+            num_delinquencies: Total delinquencies in the last 30 days per application
+            dates_of_birth: Customer dates of birth (datetime64[D])
+            credit_scores: Customer credit scores
+            internal_risk_scores: Customer internal (NB36) risk scores
+            as_of: Date at which customer ages are computed, defaults to today
+
+        Returns:
+            dict: Arrays keyed by the names in FLAG_CHECKS (bool flags), 'age', 'is_accepted' and 'credit_limit'
+        """
+        as_of = np.datetime64(as_of or datetime.date.today(), 'D')
+        num_delinquencies = np.asarray(num_delinquencies, dtype=float)
+        credit_scores = np.asarray(credit_scores, dtype=float)
+        internal_risk_scores = np.asarray(internal_risk_scores, dtype=float)
+        ages = (as_of - np.asarray(dates_of_birth, dtype='datetime64[D]')).astype(np.int64) / DAYS_IN_YEAR
+
+        columns = {
+            'has_delinquency_last_30_days': num_delinquencies > 0,
+            'is_under_18': ages < self._min_age,
+            'is_credit_score_fail': credit_scores < self._credit_score_threshold,
+            'is_internal_risk_score_fail': internal_risk_scores < self._risk_score_threshold,
+            }
+        is_accepted = ~np.logical_or.reduce([columns[name] for name in FLAG_CHECKS])
+        columns['age'] = np.trunc(ages).astype(np.int64)
+        columns['is_accepted'] = is_accepted
+        columns['credit_limit'] = np.where(
+            is_accepted, credit_limits(credit_scores=credit_scores, internal_risk_scores=internal_risk_scores), np.nan
+            )
+
+        return columns
+
+    def decide_batch(
+            self,
+            payloads: Sequence[dict],
+            as_of: Optional[datetime.date] = None
+            ) -> List[dict]:
+        """
+        Decide a batch of application payloads with one vectorised pass
+
+        Args:
+            payloads: Application payloads, as for run_customer_credit_check (left unmodified)
+            as_of: Date at which customer ages are computed, defaults to today
+
+        Returns:
+            list: One decision dict per payload, in order
+        """
+        if len(payloads) == 0:
+            return []
+        features = np.array([extract_features(payload) for payload in payloads], dtype=float)
+        columns = self.decide_columns(
+            num_delinquencies=features[:, 0],
+            dates_of_birth=dates_from_parts(years=features[:, 1], months=features[:, 2], days=features[:, 3]),
+            credit_scores=features[:, 4],
+            internal_risk_scores=features[:, 5],
+            as_of=as_of,
+            )
+        check_values = {
+            'has_delinquency_last_30_days': features[:, 0].tolist(),
+            'is_under_18': columns['age'].tolist(),
+            'is_credit_score_fail': features[:, 4].tolist(),
+            'is_internal_risk_score_fail': features[:, 5].tolist(),
+            }
+        flags = {name: columns[name].tolist() for name in FLAG_CHECKS}
+        is_accepted = columns['is_accepted'].tolist()
+        limits = columns['credit_limit'].tolist()
+
+        return [
+            {
+                'application_id': payload.get('application_id'),
+                'flag_checks': {name: flags[name][i] for name in FLAG_CHECKS},
+                'check_outcome': {name: check_values[name][i] for name in FLAG_CHECKS},
+                'knockout_result': 'ACCEPT' if is_accepted[i] else 'REJECT',
+                'credit_limit': limits[i],
+                }
+            for i, payload in enumerate(payloads)
+            ]
+
+    def decide(
+            self,
+            customer_data_dict: dict,
+            as_of: Optional[datetime.date] = None
+            ) -> dict:
+        """
+        Decide a single application payload, safe to call from many threads at once
+
+        Args:
+            customer_data_dict: Application payload, as for run_customer_credit_check (left unmodified)
+            as_of: Date at which customer ages are computed, defaults to today
+
+        Returns:
+            dict: Decision, see DecisionEngine
+        """
+        start_ns = time.perf_counter_ns()
+        try:
+            decision = self.decide_batch([customer_data_dict], as_of=as_of)[0]
+        except Exception as exc:
+            if self._registry is not None:
+                self._registry.record(time.perf_counter_ns() - start_ns, outcome='ERROR', knockout=type(exc).__name__)
+            raise
+        if self._registry is not None:
+            self._registry.record_decision(time.perf_counter_ns() - start_ns, decision)
+
+        return decision
+
+    def decide_columns_concurrent(
+            self,
+            num_delinquencies: np.ndarray,
+            dates_of_birth: np.ndarray,
+            credit_scores: np.ndarray,
+            internal_risk_scores: np.ndarray,
+            max_workers: Optional[int] = None,
+            chunk_size: int = 262144,
+            executor: Optional[Executor] = None,
+            as_of: Optional[datetime.date] = None
+            ) -> Dict[str, np.ndarray]:
+        """
+        Decide columns of applications on a thread pool, split into chunks decided with
+        decide_columns. The work of each chunk is in NumPy kernels, which release the
+        GIL, so the chunks run in parallel. Columns can come straight from Arrow or
+        Parquet (see columnar_io.py).
+
+        Dict payloads should be decided with decide_batch on a single thread: reading
+        the payloads and building the result dicts is Python code holding the GIL, and
+        dominates the cost of a batch, so a thread pool over dict batches does not scale.
+
+        Args:
+            num_delinquencies: Total delinquencies in the last 30 days per application
+            dates_of_birth: Customer dates of birth (datetime64[D])
+            credit_scores: Customer credit scores
+            internal_risk_scores: Customer internal (NB36) risk scores
+            max_workers: Number of threads, if no executor is given
+            chunk_size: Number of applications per chunk
+            executor: Existing executor to run the chunks on, a new thread pool if None
+            as_of: Date at which customer ages are computed, defaults to today (same for all chunks)
+
+        Returns:
+            dict: Arrays as returned by decide_columns, over all applications
+        """
+        as_of = as_of or datetime.date.today()
+        columns = [
+            np.asarray(num_delinquencies, dtype=float),
+            np.asarray(dates_of_birth, dtype='datetime64[D]'),
+            np.asarray(credit_scores, dtype=float),
+            np.asarray(internal_risk_scores, dtype=float),
+            ]
+        num_rows = len(columns[0])
+
+        def decide_chunk(start: int) -> Dict[str, np.ndarray]:
+            chunk = [column[start:start + chunk_size] for column in columns]
+            return self.decide_columns(*chunk, as_of=as_of)
+
+        starts = range(0, max(num_rows, 1), chunk_size)
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=max_workers) as own_executor:
+                results = list(own_executor.map(decide_chunk, starts))
+        else:
+            results = list(executor.map(decide_chunk, starts))
+
+        return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
@@ -7,14 +7,585 @@ Submission includes
 - Jupyter notebook
 - Response to Head of Credit
 - Documentation with follow up questions
+
+Portfolio analytics over bureau archives too large for memory:
+    python exploratory_data_analysis.py archive_1.jsonl.gz archive_2.jsonl.gz \
+        --chunk-size 10000 --checkpoint-dir .eda_checkpoints --processes 4
 """
 
+# built in imports
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import pprint  # pretty print JSON dicts with nested dicts indented
+import warnings
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# third party imports
+import numpy as np
 import pandas as pd
-import pprint # pretty print JSON dicts with nested dicts indented
 
 pd.options.display.width = 1000
 pd.options.display.max_columns = 10
 
+# ----------
+# chunked portfolio analytics
+# ----------
+# Bureau archives are JSON Lines files (optionally gzipped), one credit bureau
+# report - or one application payload with the key 'credit_bureau_report' - per line.
+# Archives are streamed in fixed-size chunks; every chunk is reduced to fixed-size
+# histograms and moments, which are merged across chunks and processes, so memory
+# depends on the chunk size and not on the size of the archive.
+DEFAULT_CHUNK_SIZE = 10000
+CHECKPOINT_VERSION = 2
+
+DELINQUENCY_BIN_EDGES = np.append(np.arange(0, 11), np.inf)
+SCORE_BIN_EDGES = np.append(np.arange(0, 1001, 25), np.inf)
+AGE_BIN_EDGES = np.append(np.arange(0, 101, 5), np.inf)
+BALANCE_BIN_EDGES = np.array(
+    [0, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, np.inf]
+    )
+
+# metric name: bin edges, bins are [edge_i, edge_i+1) and values outside the
+# edges are clipped into the first/last bin
+METRIC_BIN_EDGES = {
+    'delinquencies30Days': DELINQUENCY_BIN_EDGES,
+    'delinquencies60Days': DELINQUENCY_BIN_EDGES,
+    'delinquencies90to180Days': DELINQUENCY_BIN_EDGES,
+    'report_delinquencies30Days': DELINQUENCY_BIN_EDGES,
+    'credit_score': SCORE_BIN_EDGES,
+    'NB36_risk_score': SCORE_BIN_EDGES,
+    'age': AGE_BIN_EDGES,
+    'amount1': BALANCE_BIN_EDGES,
+    'balanceAmount': BALANCE_BIN_EDGES,
+    }
+TRADELINE_METRICS = [
+    'delinquencies30Days', 'delinquencies60Days', 'delinquencies90to180Days', 'amount1', 'balanceAmount'
+    ]
+
+
+class DistributionAggregate:
+    """
+    Mergeable partial aggregate of one metric: fixed-bin histogram plus
+    count, sum, sum of squares, min and max of the observed values.
+    Discrete metrics (counts, e.g. delinquencies) have unit-width bins and
+    their quantiles are not interpolated within a bin.
+    """
+
+    def __init__(
+            self,
+            bin_edges: np.ndarray,
+            discrete: bool = False
+            ):
+        self.bin_edges = np.asarray(bin_edges, dtype=float)
+        self.discrete = discrete
+        self.counts = np.zeros(len(self.bin_edges) - 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(
+            self,
+            values: np.ndarray
+            ) -> None:
+        """Add an array of observations, NaN values (missing fields) are ignored"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        bin_index = np.clip(
+            np.searchsorted(self.bin_edges, values, side='right') - 1, 0, len(self.counts) - 1
+            )
+        self.counts += np.bincount(bin_index, minlength=len(self.counts))
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(
+            self,
+            other: 'DistributionAggregate'
+            ) -> 'DistributionAggregate':
+        """Add the partial aggregate of another chunk into this one"""
+        if not np.array_equal(self.bin_edges, other.bin_edges):
+            raise ValueError("Cannot merge distributions with different bin edges")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def quantile(
+            self,
+            q: float
+            ) -> float:
+        """Approximate quantile, interpolated linearly within the histogram bin"""
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        rank = q * self.count
+        bin_num = int(np.searchsorted(cumulative, rank, side='left'))
+        lower = max(self.bin_edges[bin_num], self.min)
+        if self.discrete:
+            return float(lower)
+        upper = min(self.bin_edges[bin_num + 1], self.max)
+        previous = cumulative[bin_num - 1] if bin_num > 0 else 0
+        fraction = (rank - previous) / self.counts[bin_num] if self.counts[bin_num] else 0.0
+
+        return float(lower + fraction * (upper - lower))
+
+    def summary(self) -> dict:
+        """Return the descriptive statistics and the histogram of the metric"""
+        mean = self.total / self.count if self.count else np.nan
+        variance = self.total_sq / self.count - mean ** 2 if self.count else np.nan
+        histogram = {
+            f"[{self.bin_edges[i]:g}, {self.bin_edges[i + 1]:g})": int(c) for i, c in enumerate(self.counts)
+            }
+
+        return {
+            'count': self.count,
+            'mean': mean,
+            'std': float(np.sqrt(max(variance, 0.0))) if self.count else np.nan,
+            'min': self.min if self.count else np.nan,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max if self.count else np.nan,
+            'histogram': histogram,
+            }
+
+    def to_dict(self) -> dict:
+        """Serialise to a JSON compatible dict (for checkpoints)"""
+        return {
+            'counts': self.counts.tolist(),
+            'count': self.count,
+            'total': self.total,
+            'total_sq': self.total_sq,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            }
+
+    @classmethod
+    def from_dict(
+            cls,
+            data: dict,
+            bin_edges: np.ndarray,
+            discrete: bool = False
+            ) -> 'DistributionAggregate':
+        aggregate = cls(bin_edges=bin_edges, discrete=discrete)
+        aggregate.counts = np.asarray(data['counts'], dtype=np.int64)
+        aggregate.count = data['count']
+        aggregate.total = data['total']
+        aggregate.total_sq = data['total_sq']
+        aggregate.min = np.inf if data['min'] is None else data['min']
+        aggregate.max = -np.inf if data['max'] is None else data['max']
+
+        return aggregate
+
+
+class PortfolioAggregate:
+    """Mergeable partial aggregates of all portfolio metrics, see METRIC_BIN_EDGES"""
+
+    def __init__(self):
+        self.num_reports = 0
+        self.num_tradelines = 0
+        self.num_bad_records = 0
+        self.metrics = {
+            name: DistributionAggregate(bin_edges=edges, discrete=edges is DELINQUENCY_BIN_EDGES)
+            for name, edges in METRIC_BIN_EDGES.items()
+            }
+
+    def merge(
+            self,
+            other: 'PortfolioAggregate'
+            ) -> 'PortfolioAggregate':
+        self.num_reports += other.num_reports
+        self.num_tradelines += other.num_tradelines
+        self.num_bad_records += other.num_bad_records
+        for name, metric in self.metrics.items():
+            metric.merge(other.metrics[name])
+
+        return self
+
+    def summary(self) -> dict:
+        return {
+            'num_reports': self.num_reports,
+            'num_tradelines': self.num_tradelines,
+            'num_bad_records': self.num_bad_records,
+            'metrics': {name: metric.summary() for name, metric in self.metrics.items()},
+            }
+
+    def to_dict(self) -> dict:
+        return {
+            'num_reports': self.num_reports,
+            'num_tradelines': self.num_tradelines,
+            'num_bad_records': self.num_bad_records,
+            'metrics': {name: metric.to_dict() for name, metric in self.metrics.items()},
+            }
+
+    @classmethod
+    def from_dict(
+            cls,
+            data: dict
+            ) -> 'PortfolioAggregate':
+        aggregate = cls()
+        aggregate.num_reports = data['num_reports']
+        aggregate.num_tradelines = data['num_tradelines']
+        aggregate.num_bad_records = data['num_bad_records']
+        aggregate.metrics = {
+            name: DistributionAggregate.from_dict(
+                data=data['metrics'][name], bin_edges=edges, discrete=edges is DELINQUENCY_BIN_EDGES
+                )
+            for name, edges in METRIC_BIN_EDGES.items()
+            }
+
+        return aggregate
+
+
+def _to_float(
+        value
+        ) -> float:
+    """Helper function to convert a (zero padded string) bureau value to float, NaN if missing"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def aggregate_chunk(
+        records: List[dict],
+        as_of: datetime.date
+        ) -> PortfolioAggregate:
+    """
+    Reduce a chunk of bureau reports (or application payloads) to a PortfolioAggregate
+
+    Args:
+        records: Credit bureau reports, or payloads containing the key 'credit_bureau_report'
+        as_of: Date at which customer ages are computed
+
+    Returns:
+        PortfolioAggregate: Partial aggregate of the chunk
+    """
+    aggregate = PortfolioAggregate()
+    tradeline_values = {name: [] for name in TRADELINE_METRICS}
+    report_values = {name: [] for name in ['report_delinquencies30Days', 'credit_score', 'NB36_risk_score', 'age']}
+
+    for record in records:
+        # everything is read before anything is appended, so a malformed record
+        # (not an object, bad date, non-object tradeline, ...) is skipped as a whole
+        try:
+            report = record.get('credit_bureau_report', record)
+            tradelines = report.get('tradeline') or []
+            date_of_birth = report['consumerIdentity']['date_of_birth']
+            age = (as_of - datetime.date(
+                year=date_of_birth['year'], month=date_of_birth['month'], day=date_of_birth['day']
+                )).days / 365.25
+            risk_model = report.get('riskModel') or [{}]
+            credit_score = _to_float(risk_model[0].get('credit_score'))
+            record_tradeline_values = {
+                name: [_to_float(tradeline.get(name)) for tradeline in tradelines] for name in TRADELINE_METRICS
+                }
+            risk_score = _to_float(record.get('NB36_risk_score'))
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+            aggregate.num_bad_records += 1
+            continue
+
+        for name, values in record_tradeline_values.items():
+            tradeline_values[name].extend(values)
+        report_values['report_delinquencies30Days'].append(np.nansum(record_tradeline_values['delinquencies30Days']))
+        report_values['credit_score'].append(credit_score)
+        report_values['NB36_risk_score'].append(risk_score)
+        report_values['age'].append(age)
+        aggregate.num_reports += 1
+        aggregate.num_tradelines += len(tradelines)
+
+    for name, values in {**tradeline_values, **report_values}.items():
+        aggregate.metrics[name].update(np.asarray(values, dtype=float))
+
+    return aggregate
+
+
+def _open_archive(
+        path: str
+        ):
+    """Open a bureau archive for binary reading, transparently decompressing .gz files"""
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def iter_archive_chunks(
+        path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start_offset: int = 0,
+        end_offset: Optional[int] = None
+        ) -> Iterator[Tuple[List[dict], int, int]]:
+    """
+    Stream a JSON Lines bureau archive in chunks of at most chunk_size records
+
+    Args:
+        path: Path to the archive (.jsonl or .jsonl.gz)
+        chunk_size: Maximum number of records per chunk
+        start_offset: (Uncompressed) byte offset to resume reading from. Seeking in a .gz
+            archive decompresses everything before start_offset again, so resuming a
+            gzipped archive costs a re-read of the part already processed (but no re-parsing)
+        end_offset: Byte offset to stop at (the start of a line, see split_archive), None to read to the end
+
+    Yields:
+        list: Parsed records of the chunk
+        int: Number of lines in the chunk that could not be parsed
+        int: Byte offset just after the chunk, to resume from
+    """
+    offset = start_offset
+    with _open_archive(path) as archive:
+        archive.seek(start_offset)
+        records, num_bad_lines = [], 0
+        for line in archive:
+            if end_offset is not None and offset >= end_offset:
+                break
+            offset += len(line)
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    num_bad_lines += 1
+            if len(records) + num_bad_lines >= chunk_size:
+                yield records, num_bad_lines, offset
+                records, num_bad_lines = [], 0
+        if records or num_bad_lines:
+            yield records, num_bad_lines, offset
+
+
+def split_archive(
+        path: str,
+        num_parts: int
+        ) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split an uncompressed archive into byte ranges aligned to line boundaries, so
+    the ranges can be aggregated by different processes. Gzipped archives cannot
+    be read from an arbitrary offset without decompressing everything before it,
+    so they are never split.
+
+    Args:
+        path: Path to the archive (.jsonl or .jsonl.gz)
+        num_parts: Number of ranges to split into
+
+    Returns:
+        list: (start, end) byte offsets of the non-empty ranges, end None meaning the end of the archive
+    """
+    if path.endswith('.gz') or num_parts <= 1:
+        return [(0, None)]
+
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as archive:
+        for part in range(1, num_parts):
+            target = max(size * part // num_parts, boundaries[-1], 1)
+            # move to the start of the first line beginning at or after target
+            archive.seek(target - 1)
+            archive.readline()
+            boundaries.append(max(archive.tell(), boundaries[-1]))
+    boundaries.append(size)
+    ranges = [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if start < end]
+
+    return ranges or [(0, None)]
+
+
+def _checkpoint_path(
+        path: str,
+        checkpoint_dir: str,
+        byte_range: Tuple[int, Optional[int]] = (0, None)
+        ) -> str:
+    """Helper function to return the checkpoint file of (a byte range of) an archive"""
+    abs_path = os.path.abspath(path)
+    digest = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:12]
+    range_suffix = '' if byte_range == (0, None) else f".{byte_range[0]}-{byte_range[1]}"
+
+    return os.path.join(checkpoint_dir, f"{os.path.basename(path)}.{digest}{range_suffix}.json")
+
+
+def _read_checkpoint(
+        checkpoint_path: str
+        ) -> Optional[dict]:
+    """Helper function to load a checkpoint, None if there is none"""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        return json.load(f)
+
+
+def _write_checkpoint(
+        checkpoint_path: str,
+        checkpoint: dict
+        ) -> None:
+    """Atomically write a checkpoint, so an interrupted run never leaves a corrupt file"""
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def checkpoint_as_of(
+        paths: List[str],
+        checkpoint_dir: Optional[str]
+        ) -> Optional[datetime.date]:
+    """
+    Return the as_of date stored in the existing checkpoints of the archives, so
+    a run resumed on a later day keeps computing ages at the date it started with
+
+    Returns:
+        datetime.date: as_of of the first checkpoint found, None if there is none
+    """
+    if checkpoint_dir is None or not os.path.isdir(checkpoint_dir):
+        return None
+    for path in paths:
+        prefix = os.path.basename(_checkpoint_path(path=path, checkpoint_dir=checkpoint_dir))[:-len('.json')]
+        for file_name in sorted(os.listdir(checkpoint_dir)):
+            if file_name.startswith(prefix) and file_name.endswith('.json'):
+                checkpoint = _read_checkpoint(os.path.join(checkpoint_dir, file_name))
+                if checkpoint and 'as_of' in checkpoint:
+                    return datetime.date.fromisoformat(checkpoint['as_of'])
+
+    return None
+
+
+def process_archive(
+        path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_dir: Optional[str] = None,
+        as_of: Optional[datetime.date] = None,
+        byte_range: Tuple[int, Optional[int]] = (0, None)
+        ) -> PortfolioAggregate:
+    """
+    Aggregate a bureau archive (or a byte range of it, see split_archive) chunk by
+    chunk. With a checkpoint_dir the running aggregate, the read offset and as_of
+    are saved after every chunk, and a later call resumes from the last completed
+    chunk with the saved as_of. Progress is only discarded (with a warning) if the
+    archive changed or an explicit, different as_of is given.
+
+    Args:
+        path: Path to the archive (.jsonl or .jsonl.gz)
+        chunk_size: Maximum number of records held in memory at once
+        checkpoint_dir: Directory for resumable checkpoints, no checkpointing if None
+        as_of: Date at which customer ages are computed, defaults to the as_of of the
+            checkpoint when resuming, else today
+        byte_range: (start, end) byte offsets to aggregate, end None meaning the end of the archive
+
+    Returns:
+        PortfolioAggregate: Aggregate of the archive (range)
+    """
+    archive_stat = os.stat(path)
+    fingerprint = {
+        'version': CHECKPOINT_VERSION,
+        'path': os.path.abspath(path),
+        'size': archive_stat.st_size,
+        'mtime': archive_stat.st_mtime,
+        'byte_range': list(byte_range),
+        }
+
+    aggregate, offset, checkpoint_path = PortfolioAggregate(), byte_range[0], None
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpoint_path = _checkpoint_path(path=path, checkpoint_dir=checkpoint_dir, byte_range=byte_range)
+        checkpoint = _read_checkpoint(checkpoint_path)
+        if checkpoint is not None:
+            if checkpoint['fingerprint'] != fingerprint:
+                warnings.warn(f"{path} changed since its checkpoint was written, starting it again")
+            elif as_of is not None and as_of.isoformat() != checkpoint['as_of']:
+                warnings.warn(
+                    f"as_of {as_of} differs from the checkpoint of {path} ({checkpoint['as_of']}), starting it again"
+                    )
+            else:
+                as_of = datetime.date.fromisoformat(checkpoint['as_of'])
+                aggregate = PortfolioAggregate.from_dict(checkpoint['aggregate'])
+                offset = checkpoint['offset']
+                if checkpoint['complete']:
+                    return aggregate
+    as_of = as_of or datetime.date.today()
+
+    def checkpoint_state(complete: bool) -> dict:
+        return {
+            'fingerprint': fingerprint, 'as_of': as_of.isoformat(), 'offset': offset,
+            'complete': complete, 'aggregate': aggregate.to_dict(),
+            }
+
+    for records, num_bad_lines, offset in iter_archive_chunks(
+            path, chunk_size=chunk_size, start_offset=offset, end_offset=byte_range[1]
+            ):
+        chunk_aggregate = aggregate_chunk(records=records, as_of=as_of)
+        chunk_aggregate.num_bad_records += num_bad_lines
+        aggregate.merge(chunk_aggregate)
+        if checkpoint_path is not None:
+            _write_checkpoint(checkpoint_path, checkpoint_state(complete=False))
+
+    if checkpoint_path is not None:
+        _write_checkpoint(checkpoint_path, checkpoint_state(complete=True))
+
+    return aggregate
+
+
+def _process_archive_worker(
+        kwargs: dict
+        ) -> dict:
+    """Helper function for the process pool, aggregates are returned serialised"""
+    return process_archive(**kwargs).to_dict()
+
+
+def run_portfolio_analytics(
+        paths: List[str],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_dir: Optional[str] = None,
+        processes: int = 1,
+        as_of: Optional[datetime.date] = None
+        ) -> Dict:
+    """
+    Compute the portfolio distributions over many bureau archives on a pool of
+    worker processes, merging the partial aggregates of all workers. Uncompressed
+    archives are split into one line-aligned byte range per process, so a single
+    large archive is spread over all processes; gzipped archives cannot be split
+    and are aggregated by one process each. Resuming from checkpoints requires
+    the same number of processes (the byte ranges must match).
+
+    Args:
+        paths: Paths to the archives (.jsonl or .jsonl.gz)
+        chunk_size: Maximum number of records held in memory at once, per process
+        checkpoint_dir: Directory for resumable checkpoints, no checkpointing if None
+        processes: Number of worker processes
+        as_of: Date at which customer ages are computed, defaults to the as_of of
+            existing checkpoints, else today
+
+    Returns:
+        dict: Summary statistics and histograms per metric, see PortfolioAggregate.summary
+    """
+    # one as_of for every archive, resumed runs keep the date they started with
+    as_of = as_of or checkpoint_as_of(paths=paths, checkpoint_dir=checkpoint_dir) or datetime.date.today()
+    jobs = [
+        {
+            'path': path, 'chunk_size': chunk_size, 'checkpoint_dir': checkpoint_dir,
+            'as_of': as_of, 'byte_range': byte_range,
+            }
+        for path in paths
+        for byte_range in split_archive(path=path, num_parts=processes)
+        ]
+
+    total = PortfolioAggregate()
+    if processes > 1 and len(jobs) > 1:
+        with Pool(processes=min(processes, len(jobs))) as pool:
+            for result in pool.imap_unordered(_process_archive_worker, jobs):
+                total.merge(PortfolioAggregate.from_dict(result))
+    else:
+        for job in jobs:
+            total.merge(process_archive(**job))
+
+    return total.summary()
 
 
 # ----------
@@ -162,51 +733,86 @@ example_payload = {
 }
 
 
-# view the data
-pp = pprint.PrettyPrinter(indent=4)
-pp.pprint(credit_bureau_report)
 
-customer_data = credit_bureau_report
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Portfolio analytics over credit bureau archives")
+    parser.add_argument('archives', nargs='*', help="JSON Lines bureau archives (.jsonl or .jsonl.gz)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--checkpoint-dir', default=None, help="directory for resumable checkpoints")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="worker processes; uncompressed archives are split across them, "
+                             ".gz archives are processed by one worker each")
+    parser.add_argument('--as-of', type=datetime.date.fromisoformat, default=None,
+                        help="date (YYYY-MM-DD) at which ages are computed, defaults to the date stored "
+                             "in existing checkpoints, else today")
+    parser.add_argument('--output', default=None, help="write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    if args.archives:
+        portfolio_summary = run_portfolio_analytics(
+            paths=args.archives,
+            chunk_size=args.chunk_size,
+            checkpoint_dir=args.checkpoint_dir,
+            processes=args.processes,
+            as_of=args.as_of,
+            )
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(portfolio_summary, f, indent=4)
+        for metric_name, metric_summary in portfolio_summary['metrics'].items():
+            print(metric_name)
+            print(pd.Series({k: v for k, v in metric_summary.items() if k != 'histogram'}).to_string())
+    else:
+        # no archives given - explore the sample data
+        # view the data
+        pp = pprint.PrettyPrinter(indent=4)
+        pp.pprint(credit_bureau_report)
+
+        customer_data = credit_bureau_report
+
+        # parse the customer data, change the dtype to float from str where appropriate
 
-# parse the customer data, change the dtype to float from str where appropriate
+        # e.g. delinquencies
+        pd.DataFrame(customer_data['tradeline'])
 
-# e.g. delinquencies
-pd.DataFrame(customer_data['tradeline'])
+        tradeline_columns_to_convert_to_float = [
+          'amount1', 'amount2', 'balanceAmount', 'delinquencies30Days'
+        ]
 
-tradeline_columns_to_convert_to_float = [
-  'amount1', 'amount2', 'balanceAmount', 'delinquencies30Days'
-]
+        # ------
+        # Rules
+        # ------
+        # IF has_delinquency_last_30_days > 0 THEN FAIL
+        #
+        # delinquencies last 30 days is in the 'tradeline' key, within
+        # each different account
+        type(customer_data['tradeline'])
+        # of type list, so convert to dataframe with named columns, then filter
+        # by column values
+        customer_df_tradeline = pd.DataFrame(customer_data['tradeline'])["delinquencies30Days"]
 
-# ------
-# Rules
-# ------
-# IF has_delinquency_last_30_days > 0 THEN FAIL
-#
-# delinquencies last 30 days is in the 'tradeline' key, within
-# each different account
-type(customer_data['tradeline'])
-# of type list, so convert to dataframe with named columns, then filter
-# by column values
-customer_df_tradeline = pd.DataFrame(customer_data['tradeline'])["delinquencies30Days"]
+        # --------
+        # IF age < 18 THEN FAIL
+        # extract this from the ['consumerIdentity']['date_of_birth'] -
+        # convert to datetime, use the datetime from today
+        # --------
 
-# --------
-# IF age < 18 THEN FAIL
-# extract this from the ['consumerIdentity']['date_of_birth'] -
-# convert to datetime, use the datetime from today
-# --------
+        # --------
+        # IF credit_score < 500 THEN FAIL
+        # risk_model - credit score, convert str to float, and extract the value
+        # according to the boolean
 
-# --------
-# IF credit_score < 500 THEN FAIL
-# risk_model - credit score, convert str to float, and extract the value
-# according to the boolean
+        # --------
 
-# --------
+        # IF internal_risk_score < 450 THEN FAIL
+        # implement internal_risk_score table logic
+        # using the NB36_risk_score
 
-# IF internal_risk_score < 450 THEN FAIL
-# implement internal_risk_score table logic
-# using the NB36_risk_score
+        # IF any of the rules above failed then REJECT, else ACCEPT
 
-# IF any of the rules above failed then REJECT, else ACCEPT
+        # use this by conversion to float type, then bool flags where False/True,
+        # some or conditions, then return PASS/FAIL
 
-# use this by conversion to float type, then bool flags where False/True,
-# some or conditions, then return PASS/FAIL
+        # distributions of the sample reports, as computed by the chunked pipeline
+        pp.pprint(aggregate_chunk(records=[credit_bureau_report, credit_bureau_report2],
+                                  as_of=datetime.date.today()).summary())
@@ -0,0 +1,475 @@
+"""
+Created by: Philip P
+Created on: Mon 19 Oct 2026
+
+Latency SLO histograms for the NB36 credit decision flow
+- Fixed-memory, HDR-style log-bucketed latency histograms
+- One histogram per decision outcome (ACCEPT/REJECT, and which knockout fired)
+- Local text endpoint exposing the histograms in Prometheus format
+"""
+# built in imports
+import functools
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# HDR-style bucketing: every power of two of nanoseconds between 2^MIN_EXPONENT
+# (~1 microsecond) and 2^MAX_EXPONENT (~69 seconds) is split into SUB_BUCKET_COUNT
+# linear sub-buckets, which bounds the relative error of a quantile to 1/SUB_BUCKET_COUNT
+MIN_EXPONENT = 10
+MAX_EXPONENT = 36
+SUB_BUCKET_BITS = 3
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+# bucket 0 is the underflow bucket (< 2^MIN_EXPONENT ns), the last bucket is the overflow bucket
+NUM_BUCKETS = (MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKET_COUNT + 2
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = 'credit_check_decision_latency_seconds'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def bucket_index(
+        value_ns: int
+        ) -> int:
+    """
+    Return the histogram bucket index for a latency in nanoseconds
+
+    Args:
+        value_ns: Latency in nanoseconds
+
+    Returns:
+        int: Bucket index, in the range [0, NUM_BUCKETS)
+    """
+    if value_ns < (1 << MIN_EXPONENT):
+        return 0
+    exponent = value_ns.bit_length() - 1
+    if exponent >= MAX_EXPONENT:
+        return NUM_BUCKETS - 1
+    sub_bucket = (value_ns >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKET_COUNT - 1)
+
+    return (exponent - MIN_EXPONENT) * SUB_BUCKET_COUNT + sub_bucket + 1
+
+
+def bucket_upper_bound_ns(
+        index: int
+        ) -> float:
+    """
+    Return the (exclusive) upper bound in nanoseconds of a histogram bucket
+
+    Args:
+        index: Bucket index, as returned by bucket_index
+
+    Returns:
+        float: Upper bound of the bucket in nanoseconds, inf for the overflow bucket
+    """
+    if index == 0:
+        return float(1 << MIN_EXPONENT)
+    if index >= NUM_BUCKETS - 1:
+        return float('inf')
+    exponent = MIN_EXPONENT + (index - 1) // SUB_BUCKET_COUNT
+    sub_bucket = (index - 1) % SUB_BUCKET_COUNT
+
+    return float((1 << exponent) + ((sub_bucket + 1) << (exponent - SUB_BUCKET_BITS)))
+
+
+class _ThreadShardOwner:
+    """Held only by a thread's threading.local, so it is collected when the thread exits"""
+    __slots__ = ('__weakref__',)
+
+
+def _retire_shard(
+        lock: threading.Lock,
+        shards: Dict[int, List[int]],
+        base_shard: List[int],
+        shard: List[int]
+        ) -> None:
+    """Fold the shard of an exited thread into the base shard, and stop tracking it"""
+    with lock:
+        for index, value in enumerate(shard):
+            base_shard[index] += value
+        shards.pop(id(shard), None)
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram, safe to update from many threads.
+
+    Every live thread records into its own shard of bucket counts, so recording is
+    a bucket lookup and two integer additions without taking any lock, and it can
+    stay on in production without moving the latency it measures. When a thread
+    exits its shard is folded into a base shard, so memory is bounded by the
+    number of live threads, not by the number of threads that ever recorded.
+    The shards are summed when the histogram is read (e.g. on a /metrics scrape).
+    """
+
+    __slots__ = ('_shards', '_base_shard', '_local', '_lock')
+
+    def __init__(self):
+        # each shard holds the count per bucket, followed by the sum of observations in ns
+        self._base_shard = [0] * (NUM_BUCKETS + 1)
+        self._shards: Dict[int, List[int]] = {id(self._base_shard): self._base_shard}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def num_shards(self) -> int:
+        """Number of shards currently held (base shard plus one per live recording thread)"""
+        return len(self._shards)
+
+    def thread_shard(self) -> List[int]:
+        """Return the shard of the calling thread, creating it on first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * (NUM_BUCKETS + 1)
+            owner = _ThreadShardOwner()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, _retire_shard, self._lock, self._shards, self._base_shard, shard)
+            self._local.shard = shard
+            self._local.owner = owner
+            return shard
+
+    def record(
+            self,
+            value_ns: int
+            ) -> None:
+        """Record a single latency observation, in nanoseconds"""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self.thread_shard()
+        # bucket_index inlined, this is on the hot path of every decision
+        if value_ns < (1 << MIN_EXPONENT):
+            index = 0
+        else:
+            exponent = value_ns.bit_length() - 1
+            if exponent >= MAX_EXPONENT:
+                index = NUM_BUCKETS - 1
+            else:
+                index = ((exponent - MIN_EXPONENT) * SUB_BUCKET_COUNT
+                         + ((value_ns >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKET_COUNT - 1)) + 1)
+        shard[index] += 1
+        shard[NUM_BUCKETS] += value_ns
+
+    def merge(
+            self,
+            other: 'LatencyHistogram'
+            ) -> None:
+        """Add the observations of another histogram into this one"""
+        counts, sum_ns = other.snapshot()
+        with self._lock:
+            for index, count in enumerate(counts):
+                self._base_shard[index] += count
+            self._base_shard[NUM_BUCKETS] += sum_ns
+
+    def reset(self) -> None:
+        """
+        Zero all observations in place, so threads holding on to this histogram
+        keep recording into it (an observation racing with the reset may survive it)
+        """
+        with self._lock:
+            for shard in self._shards.values():
+                shard[:] = [0] * (NUM_BUCKETS + 1)
+
+    def snapshot(self) -> Tuple[List[int], int]:
+        """
+        Take a copy of the histogram, summed over all thread shards
+
+        Returns:
+            list: Count of observations per bucket
+            int: Sum of all observations in nanoseconds
+        """
+        with self._lock:
+            totals = [sum(values) for values in zip(*self._shards.values())]
+
+        return totals[:NUM_BUCKETS], totals[NUM_BUCKETS]
+
+    @property
+    def count(self) -> int:
+        return sum(self.snapshot()[0])
+
+    def quantile(
+            self,
+            q: float
+            ) -> float:
+        """
+        Return the latency at quantile q, in seconds
+
+        Args:
+            q: Quantile, between 0 and 1 (e.g. 0.99 for p99)
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile (in seconds), nan if empty
+        """
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if total == 0:
+            return float('nan')
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return bucket_upper_bound_ns(index) / 1e9
+
+        return float('inf')
+
+
+class DecisionLatencyRegistry:
+    """
+    Holds one LatencyHistogram per decision outcome, keyed by the labels
+    (outcome, knockout). The set of outcomes is small and fixed by the
+    decision rules, so memory stays bounded.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        # per thread: flag check values -> the thread's shard of the labelled histogram,
+        # so recording a decision neither rebuilds its labels nor looks up the histogram
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+
+    def histogram(
+            self,
+            outcome: str,
+            knockout: str = 'none'
+            ) -> LatencyHistogram:
+        """Return the histogram for the labels, creating it on first use"""
+        key = (outcome, knockout)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+
+        return histogram
+
+    def record(
+            self,
+            value_ns: int,
+            outcome: str,
+            knockout: str = 'none'
+            ) -> None:
+        """Record a single decision latency, in nanoseconds"""
+        self.histogram(outcome=outcome, knockout=knockout).record(value_ns)
+
+    def _decision_shard(
+            self,
+            customer_data_dct: dict
+            ) -> List[int]:
+        """Return (and cache) the calling thread's shard of the histogram labelled by the decision"""
+        try:
+            decision_shards = self._local.decision_shards
+        except AttributeError:
+            decision_shards = self._local.decision_shards = {}
+        outcome, knockout = decision_labels(customer_data_dct=customer_data_dct)
+        shard = self.histogram(outcome=outcome, knockout=knockout).thread_shard()
+        decision_shards[tuple(customer_data_dct['flag_checks'].values())] = shard
+
+        return shard
+
+    def record_decision(
+            self,
+            value_ns: int,
+            customer_data_dct: dict
+            ) -> None:
+        """
+        Record the latency of a decision, labelled by its outcome (see decision_labels)
+
+        Args:
+            value_ns: Decision latency in nanoseconds
+            customer_data_dct: Decided customer, containing the keys ['knockout_result', 'flag_checks']
+        """
+        # the outcome is determined by the flag checks (ACCEPT if none failed), so the
+        # flag values alone key this thread's shard of the labelled histogram
+        try:
+            shard = self._local.decision_shards[tuple(customer_data_dct['flag_checks'].values())]
+        except (AttributeError, KeyError):
+            shard = self._decision_shard(customer_data_dct=customer_data_dct)
+        # LatencyHistogram.record inlined, this is on the hot path of every decision
+        if value_ns < (1 << MIN_EXPONENT):
+            index = 0
+        else:
+            exponent = value_ns.bit_length() - 1
+            if exponent >= MAX_EXPONENT:
+                index = NUM_BUCKETS - 1
+            else:
+                index = ((exponent - MIN_EXPONENT) * SUB_BUCKET_COUNT
+                         + ((value_ns >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKET_COUNT - 1)) + 1)
+        shard[index] += 1
+        shard[NUM_BUCKETS] += value_ns
+
+    def reset(self) -> None:
+        """
+        Drop all recorded observations. Histograms are zeroed in place rather than
+        replaced, so concurrent records are never lost into a discarded histogram
+        """
+        with self._lock:
+            histograms = list(self._histograms.values())
+            self._start_time = time.monotonic()
+        for histogram in histograms:
+            histogram.reset()
+
+    def summary(
+            self,
+            quantiles: Tuple[float, ...] = DEFAULT_QUANTILES
+            ) -> Dict[Tuple[str, str], dict]:
+        """
+        Return count, throughput and latency quantiles (seconds) per outcome
+
+        Returns:
+            dict: Keyed by (outcome, knockout), with keys ['count', 'throughput_per_second', 'p50', ...]
+        """
+        elapsed = max(time.monotonic() - self._start_time, 1e-9)
+        result = {}
+        for key, histogram in sorted(self._histograms.items()):
+            count = histogram.count
+            result[key] = {
+                'count': count,
+                'throughput_per_second': count / elapsed,
+                **{f'p{q * 100:g}': histogram.quantile(q) for q in quantiles},
+                }
+
+        return result
+
+    def render_prometheus(self) -> str:
+        """Render all histograms in the Prometheus text exposition format"""
+        lines = [
+            f'# HELP {METRIC_NAME} Latency of run_customer_credit_check by decision outcome.',
+            f'# TYPE {METRIC_NAME} histogram',
+            ]
+        for (outcome, knockout), histogram in sorted(self._histograms.items()):
+            counts, sum_ns = histogram.snapshot()
+            labels = f'outcome="{outcome}",knockout="{knockout}"'
+            # only expose the octave boundaries to keep the scrape small, the fine
+            # sub-buckets are merged into them (octave boundaries align with sub-buckets)
+            cumulative = 0
+            for index, count in enumerate(counts):
+                cumulative += count
+                if index == 0 or (index < NUM_BUCKETS - 1 and index % SUB_BUCKET_COUNT == 0):
+                    upper_bound = bucket_upper_bound_ns(index) / 1e9
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{upper_bound:.9g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {sum_ns / 1e9:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {cumulative}')
+
+        # precomputed quantiles from the fine-grained buckets, for use without a Prometheus server
+        quantile_name = 'credit_check_decision_latency_quantile_seconds'
+        lines.append(f'# HELP {quantile_name} Decision latency quantiles by decision outcome.')
+        lines.append(f'# TYPE {quantile_name} gauge')
+        for (outcome, knockout), histogram in sorted(self._histograms.items()):
+            for q in DEFAULT_QUANTILES:
+                lines.append(
+                    f'{quantile_name}{{outcome="{outcome}",knockout="{knockout}",quantile="{q:g}"}} '
+                    f'{histogram.quantile(q):.9g}'
+                    )
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = DecisionLatencyRegistry()
+
+
+def decision_labels(
+        customer_data_dct: dict
+        ) -> Tuple[str, str]:
+    """
+    Helper function to return the (outcome, knockout) labels for a decided customer
+
+    Args:
+        customer_data_dct: Output of run_customer_credit_check, containing the keys
+        ['knockout_result', 'flag_checks']
+
+    Returns:
+        str: Knockout outcome, one of 'ACCEPT' or 'REJECT'
+        str: Names of the failed flag checks joined with '+', 'none' if no check failed
+    """
+    failed_checks = [name for name, flag in customer_data_dct['flag_checks'].items() if flag]
+    knockout = '+'.join(failed_checks) if failed_checks else 'none'
+
+    return customer_data_dct['knockout_result'], knockout
+
+
+def record_decision_latency(
+        func: Optional[Callable] = None,
+        *,
+        registry: DecisionLatencyRegistry = REGISTRY
+        ) -> Callable:
+    """
+    Decorator to record the latency of a decision function into the registry,
+    labelled by the outcome of the decision. Exceptions are recorded with the outcome 'ERROR'.
+    """
+    def decorator(decision_func: Callable) -> Callable:
+        @functools.wraps(decision_func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
+            try:
+                result = decision_func(*args, **kwargs)
+            except Exception as exc:
+                registry.record(time.perf_counter_ns() - start_ns, outcome='ERROR', knockout=type(exc).__name__)
+                raise
+            registry.record_decision(time.perf_counter_ns() - start_ns, result)
+
+            return result
+
+        return wrapper
+
+    if func is None:
+        return decorator
+
+    return decorator(func)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the registry in Prometheus format on /metrics"""
+    registry: DecisionLatencyRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes are frequent, do not spam stderr
+        pass
+
+
+def start_metrics_server(
+        port: int = 9036,
+        host: str = '127.0.0.1',
+        registry: DecisionLatencyRegistry = REGISTRY
+        ) -> ThreadingHTTPServer:
+    """
+    Start a local HTTP endpoint serving the latency histograms in Prometheus format,
+    in a background daemon thread
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        host: Interface to bind to, local only by default
+        registry: Registry to expose
+
+    Returns:
+        ThreadingHTTPServer: The running server, call .shutdown() to stop it
+    """
+    handler = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+
+    return server
+
+
+if __name__ == '__main__':
+    metrics_server = start_metrics_server()
+    print(f"Serving decision latency metrics on http://127.0.0.1:{metrics_server.server_port}/metrics")
+    threading.Event().wait()
@@ -0,0 +1,461 @@
+"""
+Created by: Philip P
+Created on: Mon 19 Oct 2026
+
+Load-test harness for the NB36 credit decision flow
+- Synthetic application payloads shaped like the sample credit bureau reports,
+  with a configurable accept/reject mix and number of tradelines
+- Drives run_customer_credit_check in-process, or a local HTTP decision endpoint
+- Open-loop (fixed requests per second) or closed-loop (N concurrent clients)
+- Reports achieved throughput, latency percentiles and error counts
+
+Example usage:
+    python load_test.py --mode open --rps 200 --duration 30 --reject-ratio 0.3
+    python load_test.py --serve 8036
+    python load_test.py --mode closed --concurrency 8 --url http://127.0.0.1:8036/decision
+"""
+# built in imports
+import argparse
+import collections
+import contextlib
+import datetime
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+# local imports
+from latency_metrics import LatencyHistogram
+from submission import run_customer_credit_check
+
+KNOCKOUT_CHECKS = [
+    'has_delinquency_last_30_days',
+    'is_under_18',
+    'is_credit_score_fail',
+    'is_internal_risk_score_fail',
+    ]
+REPORT_QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+DAYS_IN_YEAR = 365.25  # as in submission.is_under_18_years
+
+
+def _amount_str(
+        value: int
+        ) -> str:
+    """Format an amount as in the bureau reports, zero padded to 8 characters"""
+    return f"{value:08d}"
+
+
+def generate_tradeline(
+        rng: random.Random,
+        delinquencies_30_days: int = 0,
+        all_fields: bool = False
+        ) -> dict:
+    """
+    Generate a single synthetic tradeline, in the format of the sample credit bureau reports
+
+    Args:
+        rng: Random number generator
+        delinquencies_30_days: Number of delinquencies in the last 30 days for the tradeline
+        all_fields: If True, always include the optional 'amount2' and 'balanceAmount' fields
+
+    Returns:
+        dict: Tradeline
+    """
+    balance_date = datetime.date(2017, 1, 1) + datetime.timedelta(days=rng.randint(0, 6 * 365))
+    tradeline = {
+        "accountType": rng.choice(["07", "19", "26"]),
+        "amount1": _amount_str(rng.randint(100, 100000)),
+        "amount1Qualifier": rng.choice(["L", "O"]),
+        }
+    if all_fields or rng.random() < 0.5:
+        tradeline["amount2"] = _amount_str(rng.randint(0, 5000))
+        tradeline["amount2Qualifier"] = "H"
+    if all_fields or rng.random() < 0.3:
+        tradeline["balanceAmount"] = _amount_str(rng.randint(0, 50000))
+    tradeline.update({
+        "balanceDate": balance_date.strftime("%m%d%Y"),
+        "delinquencies30Days": f"{delinquencies_30_days:02d}",
+        "delinquencies60Days": "00",
+        "delinquencies90to180Days": "00",
+        "openOrClosed": rng.choice(["O", "C"]),
+        })
+
+    return tradeline
+
+
+def generate_application(
+        rng: random.Random,
+        application_id: int,
+        reject_ratio: float = 0.2,
+        tradeline_range: Tuple[int, int] = (1, 6)
+        ) -> dict:
+    """
+    Generate a synthetic application payload for run_customer_credit_check.
+    Accepted applications are drawn inside the credit limit grid, rejected
+    applications fail exactly one of the knockout checks, chosen at random.
+
+    Args:
+        rng: Random number generator
+        application_id: Application ID for the payload
+        reject_ratio: Probability that the application fails a knockout check
+        tradeline_range: Inclusive (min, max) number of tradelines in the bureau report, min at least 1
+            (the decision flow needs at least one tradeline)
+
+    Returns:
+        dict: Payload with the keys ['application_id', 'credit_bureau_report', 'NB36_risk_score']
+    """
+    if not 1 <= tradeline_range[0] <= tradeline_range[1]:
+        raise ValueError(f"Invalid tradeline range {tradeline_range}, need 1 <= min <= max")
+
+    knockout = rng.choice(KNOCKOUT_CHECKS) if rng.random() < reject_ratio else None
+
+    credit_score = rng.randint(100, 499) if knockout == 'is_credit_score_fail' else rng.randint(500, 899)
+    risk_score = rng.randint(100, 449) if knockout == 'is_internal_risk_score_fail' else rng.randint(450, 699)
+    age_years = rng.randint(10, 17) if knockout == 'is_under_18' else rng.randint(18, 80)
+    # age_years plus a random part of a year, so that the age computed by the decision
+    # flow (days / 365.25, truncated) is exactly age_years
+    min_age_days = math.ceil(age_years * DAYS_IN_YEAR)
+    date_of_birth = datetime.date.today() - datetime.timedelta(days=min_age_days + rng.randint(0, 363))
+
+    num_tradelines = rng.randint(*tradeline_range)
+    delinquent_tradeline = rng.randrange(num_tradelines) if knockout == 'has_delinquency_last_30_days' else -1
+    # the first tradeline carries every field, as the decision flow converts
+    # 'amount2' and 'balanceAmount' columns and expects them to exist
+    tradelines = [
+        generate_tradeline(
+            rng=rng,
+            delinquencies_30_days=rng.randint(1, 3) if i == delinquent_tradeline else 0,
+            all_fields=(i == 0),
+            )
+        for i in range(num_tradelines)
+        ]
+
+    return {
+        "application_id": application_id,
+        "credit_bureau_report": {
+            "consumerIdentity": {
+                "name": [
+                    {
+                        "firstName": rng.choice(["LUKE", "LAILA", "ANNA", "OMAR"]),
+                        "middleName": "",
+                        "surname": rng.choice(["DUVERGER", "MUELLER", "SMITH", "PAPADOPOULOS"]),
+                        }
+                    ],
+                "date_of_birth": {
+                    "day": date_of_birth.day,
+                    "month": date_of_birth.month,
+                    "year": date_of_birth.year,
+                    },
+                },
+            "riskModel": [
+                {
+                    "credit_score": f"{credit_score:04d}"
+                    }
+                ],
+            "tradeline": tradelines,
+            },
+        "NB36_risk_score": risk_score,
+        }
+
+
+def make_payload_factory(
+        reject_ratio: float = 0.2,
+        tradeline_range: Tuple[int, int] = (1, 6),
+        seed: Optional[int] = None
+        ) -> Callable[[], dict]:
+    """Return a thread-safe callable producing a fresh application payload per call"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counter = iter(range(1, 2 ** 63))
+
+    def factory() -> dict:
+        with lock:
+            return generate_application(
+                rng=rng,
+                application_id=next(counter),
+                reject_ratio=reject_ratio,
+                tradeline_range=tradeline_range,
+                )
+
+    return factory
+
+
+def _summarise_decision(
+        customer_data_dct: dict
+        ) -> dict:
+    """Helper function to reduce a decided customer to a JSON serialisable response"""
+    credit_limit = customer_data_dct['credit_limit']
+    if credit_limit is not None and math.isnan(credit_limit):
+        credit_limit = None
+
+    return {
+        'application_id': customer_data_dct['application_id'],
+        'knockout_result': customer_data_dct['knockout_result'],
+        'flag_checks': customer_data_dct['flag_checks'],
+        'credit_limit': credit_limit,
+        }
+
+
+def in_process_target(
+        payload: dict
+        ) -> dict:
+    """Decide a payload in-process"""
+    return _summarise_decision(run_customer_credit_check(customer_data_dict=payload))
+
+
+def make_http_target(
+        url: str,
+        timeout: float = 10.0
+        ) -> Callable[[dict], dict]:
+    """Return a target posting payloads as JSON to a decision endpoint (see serve_decisions)"""
+    def http_target(payload: dict) -> dict:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+            )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    return http_target
+
+
+class _DecisionRequestHandler(BaseHTTPRequestHandler):
+    """Decide JSON application payloads POSTed to /decision"""
+
+    def do_POST(self):
+        if self.path != '/decision':
+            self.send_error(404)
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            body = json.dumps(in_process_target(payload)).encode('utf-8')
+        except Exception as exc:
+            self.send_error(400, explain=f"{type(exc).__name__}: {exc}")
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_decisions(
+        port: int = 8036,
+        host: str = '127.0.0.1'
+        ) -> ThreadingHTTPServer:
+    """
+    Create a local HTTP endpoint deciding JSON payloads POSTed to /decision
+
+    Returns:
+        ThreadingHTTPServer: The server, call .serve_forever() to run it
+    """
+    return ThreadingHTTPServer((host, port), _DecisionRequestHandler)
+
+
+class _LoadTestRecorder:
+    """Collects latencies and errors of the requests issued during a load test"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.max_latency_ns = 0
+        self.errors = collections.Counter()
+        self.outcomes = collections.Counter()
+        self._lock = threading.Lock()
+
+    def call(
+            self,
+            target: Callable[[dict], dict],
+            payload: dict,
+            start_ns: int
+            ) -> None:
+        """Call the target, recording the latency since start_ns and the outcome or error"""
+        try:
+            result = target(payload)
+            outcome, error = result['knockout_result'], None
+        except Exception as exc:
+            outcome, error = None, type(exc).__name__
+        latency_ns = time.perf_counter_ns() - start_ns
+        self.histogram.record(latency_ns)
+        with self._lock:
+            self.max_latency_ns = max(self.max_latency_ns, latency_ns)
+            if error is None:
+                self.outcomes[outcome] += 1
+            else:
+                self.errors[error] += 1
+
+    def report(
+            self,
+            elapsed_seconds: float,
+            **extra
+            ) -> dict:
+        """Return the load test results"""
+        completed = self.histogram.count
+        num_errors = sum(self.errors.values())
+
+        return {
+            **extra,
+            'elapsed_seconds': elapsed_seconds,
+            'requests': completed,
+            'throughput_per_second': completed / elapsed_seconds if elapsed_seconds else float('nan'),
+            'errors': num_errors,
+            'error_types': dict(self.errors),
+            'outcomes': dict(self.outcomes),
+            'latency_seconds': {
+                # quantiles are bucket upper bounds, which can overshoot the largest observation
+                **{
+                    f'p{q * 100:g}': min(self.histogram.quantile(q), self.max_latency_ns / 1e9)
+                    for q in REPORT_QUANTILES
+                    },
+                'max': self.max_latency_ns / 1e9,
+                },
+            }
+
+
+def run_open_loop(
+        target: Callable[[dict], dict],
+        payload_factory: Callable[[], dict],
+        rps: float,
+        duration_seconds: float,
+        max_workers: int = 32
+        ) -> dict:
+    """
+    Issue requests at a fixed rate, independently of how fast the target responds.
+    Latency is measured from the scheduled send time, so queueing delay when the
+    target cannot keep up is included (no coordinated omission).
+
+    Args:
+        target: Callable deciding a payload
+        payload_factory: Callable returning a fresh payload
+        rps: Target requests per second
+        duration_seconds: How long to issue requests for
+        max_workers: Number of worker threads issuing requests
+
+    Returns:
+        dict: Load test report, see _LoadTestRecorder.report
+    """
+    recorder = _LoadTestRecorder()
+    interval_ns = int(1e9 / rps)
+    num_requests = int(rps * duration_seconds)
+
+    start_ns = time.perf_counter_ns()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(num_requests):
+            scheduled_ns = start_ns + i * interval_ns
+            delay_ns = scheduled_ns - time.perf_counter_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / 1e9)
+            executor.submit(recorder.call, target, payload_factory(), scheduled_ns)
+    elapsed_seconds = (time.perf_counter_ns() - start_ns) / 1e9
+
+    return recorder.report(elapsed_seconds=elapsed_seconds, mode='open', target_rps=rps)
+
+
+def run_closed_loop(
+        target: Callable[[dict], dict],
+        payload_factory: Callable[[], dict],
+        concurrency: int,
+        duration_seconds: float
+        ) -> dict:
+    """
+    Run N concurrent clients, each issuing its next request as soon as the previous one completes
+
+    Args:
+        target: Callable deciding a payload
+        payload_factory: Callable returning a fresh payload
+        concurrency: Number of concurrent clients
+        duration_seconds: How long to issue requests for
+
+    Returns:
+        dict: Load test report, see _LoadTestRecorder.report
+    """
+    recorder = _LoadTestRecorder()
+    start_ns = time.perf_counter_ns()
+    deadline_ns = start_ns + int(duration_seconds * 1e9)
+
+    def client():
+        while time.perf_counter_ns() < deadline_ns:
+            payload = payload_factory()
+            recorder.call(target, payload, time.perf_counter_ns())
+
+    clients = [threading.Thread(target=client, name=f'client-{i}') for i in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed_seconds = (time.perf_counter_ns() - start_ns) / 1e9
+
+    return recorder.report(elapsed_seconds=elapsed_seconds, mode='closed', concurrency=concurrency)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Load test the NB36 credit decision flow")
+    parser.add_argument('--mode', choices=['open', 'closed'], default='open',
+                        help="open: fixed requests per second, closed: N concurrent clients")
+    parser.add_argument('--rps', type=float, default=100, help="target requests per second (open mode)")
+    parser.add_argument('--concurrency', type=int, default=4, help="number of concurrent clients (closed mode)")
+    parser.add_argument('--workers', type=int, default=32, help="worker threads issuing requests (open mode)")
+    parser.add_argument('--duration', type=float, default=10, help="test duration in seconds")
+    parser.add_argument('--reject-ratio', type=float, default=0.2, help="share of applications failing a check")
+    parser.add_argument('--min-tradelines', type=int, default=1)
+    parser.add_argument('--max-tradelines', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--url', default=None,
+                        help="decision endpoint to POST payloads to, decided in-process if not given")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="run a local decision endpoint on PORT instead of a load test")
+    parser.add_argument('--verbose', action='store_true', help="do not silence the decision flow output")
+
+    args = parser.parse_args()
+    if not 1 <= args.min_tradelines <= args.max_tradelines:
+        parser.error("need 1 <= --min-tradelines <= --max-tradelines")
+
+    return args
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    if args.serve is not None:
+        server = serve_decisions(port=args.serve)
+        print(f"Serving decisions on http://127.0.0.1:{server.server_port}/decision")
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            server.serve_forever()
+
+    target_func = make_http_target(url=args.url) if args.url else in_process_target
+    factory = make_payload_factory(
+        reject_ratio=args.reject_ratio,
+        tradeline_range=(args.min_tradelines, args.max_tradelines),
+        seed=args.seed,
+        )
+
+    # the decision flow prints every rejection, which would dominate the measured latency
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+        if args.mode == 'open':
+            results = run_open_loop(
+                target=target_func,
+                payload_factory=factory,
+                rps=args.rps,
+                duration_seconds=args.duration,
+                max_workers=args.workers,
+                )
+        else:
+            results = run_closed_loop(
+                target=target_func,
+                payload_factory=factory,
+                concurrency=args.concurrency,
+                duration_seconds=args.duration,
+                )
+
+    print(json.dumps(results, indent=4))
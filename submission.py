@@ -9,6 +9,7 @@ Submission includes
 - Documentation with follow-up questions
 """
 # built in imports
+import copy
 import datetime
 from typing import List, Tuple
 
@@ -16,6 +17,9 @@ from typing import List, Tuple
 import pandas as pd
 import numpy as np
 
+# local imports
+from latency_metrics import record_decision_latency
+
 pd.options.display.width = 1000
 pd.options.display.max_columns = 10
 
@@ -50,7 +54,8 @@ def has_delinquency_last_30_days(
         ) -> Tuple[bool, float]:
     """
     Helper function to return if a customer has delinquencies in last 30 days
-    (containing the key 'delinquencies30Days')
+    (containing the key 'delinquencies30Days'). Tradelines without the field
+    (NaN after conversion) count as zero delinquencies
 
     Args:
       customer_data_dct (dict): Customer data dictionary containing the key 'delinquencies30Days'
@@ -61,7 +66,8 @@ def has_delinquency_last_30_days(
     # setup error handling if it has negative delinquencies, either throw an error in the program
     # and stop immediately, or smooth this and set negative values to NaN
 
-    total_delinq_30d = sum(customer_data_dct['delinquencies30Days'].values())
+    # nansum - a missing value on one tradeline must not hide the delinquencies of the others
+    total_delinq_30d = float(np.nansum(list(customer_data_dct['delinquencies30Days'].values())))
     result = True if total_delinq_30d > 0 else False
 
     return result, total_delinq_30d
@@ -284,6 +290,7 @@ def add_extra_keys_to_customer_data_dct(
     return customer_data_dct
 
 
+@record_decision_latency
 def run_customer_credit_check(
         customer_data_dict: dict
         ) -> float:
@@ -297,7 +304,9 @@ def run_customer_credit_check(
     Returns:
         dict: Return the customer data (as part of the decision flow defined in the problem)
     """
-    customer_data = customer_data_dict
+    # work on a copy, so the caller's payload (and its nested dicts) are never mutated
+    # and the same payload can be decided concurrently or more than once
+    customer_data = copy.deepcopy(customer_data_dict)
 
     assert customer_data['credit_bureau_report'], \
         f"Credit bureau report doesn't exist, customer REJECTED, application ID:" \
@@ -376,7 +385,7 @@ def run_customer_credit_check(
     return customer_data
 
 
-if __name__ == '__main___':
+if __name__ == '__main__':
     # ----------
     # sample data
     # ----------
@@ -524,7 +533,7 @@ if __name__ == '__main___':
     # create a dummy for customer data
 
     # example run - one
-    customer_data_one = example_payload
+    customer_data_one = copy.deepcopy(example_payload)
     customer_data_one['credit_bureau_report'] = credit_bureau_report_sample_one
 
     credit_limit_one = run_customer_credit_check(
@@ -532,7 +541,7 @@ if __name__ == '__main___':
         )
 
     # example run - two
-    customer_data_two = customer_data_one.copy()
+    customer_data_two = copy.deepcopy(customer_data_one)
     customer_data_two['NB36_risk_score'] = 800
 
     credit_limit_two = run_customer_credit_check(
@@ -540,7 +549,7 @@ if __name__ == '__main___':
         )
 
     # example run - three
-    customer_data_three = customer_data_one.copy()
+    customer_data_three = copy.deepcopy(customer_data_one)
     customer_data_three['credit_bureau_report']['riskModel'][0]['credit_score'] = 200
 
     credit_limit_three = run_customer_credit_check(
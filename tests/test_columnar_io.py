@@ -0,0 +1,127 @@
+import copy
+import datetime
+import math
+import random
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+import columnar_io  # noqa: E402
+from decision_engine import FLAG_CHECKS, DecisionEngine  # noqa: E402
+from exploratory_data_analysis import credit_bureau_report  # noqa: E402
+from load_test import generate_application  # noqa: E402
+
+AS_OF = datetime.date(2026, 10, 19)
+
+
+def _payload(application_id=1, risk_score=600):
+    return {
+        'application_id': application_id,
+        'credit_bureau_report': copy.deepcopy(credit_bureau_report),
+        'NB36_risk_score': risk_score,
+        }
+
+
+def _decide(payloads):
+    table = columnar_io.applications_to_table(payloads)
+    return columnar_io.decide_record_batch(table, as_of=AS_OF).to_pylist()
+
+
+def _assert_matches_engine(rows, payloads):
+    for row, decision in zip(rows, DecisionEngine(registry=None).decide_batch(payloads, as_of=AS_OF)):
+        assert row['error'] is None
+        assert row['application_id'] == decision['application_id']
+        assert row['knockout_result'] == decision['knockout_result']
+        assert {name: row[name] for name in FLAG_CHECKS} == decision['flag_checks']
+        assert row['delinquencies_last_30_days'] == decision['check_outcome']['has_delinquency_last_30_days']
+        assert row['age'] == decision['check_outcome']['is_under_18']
+        expected_limit = None if math.isnan(decision['credit_limit']) else decision['credit_limit']
+        assert row['credit_limit'] == expected_limit
+
+
+def test_empty_table():
+    decisions = columnar_io.decide_record_batch(columnar_io.applications_to_table([]), as_of=AS_OF)
+
+    assert decisions.num_rows == 0
+    assert decisions.schema == columnar_io.DECISION_SCHEMA
+
+
+def test_parquet_round_trip_matches_engine(tmp_path):
+    rng = random.Random(5)
+    payloads = [
+        generate_application(rng=rng, application_id=i, reject_ratio=0.5, tradeline_range=(1, 5))
+        for i in range(300)
+        ]
+    for payload in payloads[::5]:
+        for tradeline in payload['credit_bureau_report']['tradeline'][1:]:
+            tradeline.pop('delinquencies30Days')
+
+    input_path, output_path = str(tmp_path / 'applications.parquet'), str(tmp_path / 'decisions.parquet')
+    pq.write_table(columnar_io.applications_to_table(payloads), input_path)
+    num_decided = columnar_io.decide_parquet(
+        input_path=input_path, output_path=output_path, batch_size=64, as_of=AS_OF
+        )
+    decisions = pq.read_table(output_path)
+
+    assert decisions.schema == columnar_io.DECISION_SCHEMA
+    assert num_decided == decisions.num_rows == len(payloads)
+    _assert_matches_engine(decisions.to_pylist(), payloads)
+
+
+def test_missing_tradeline_fields_count_as_zero_like_the_engine():
+    empty_string = _payload(application_id=1)
+    for tradeline in empty_string['credit_bureau_report']['tradeline']:
+        tradeline['delinquencies30Days'] = ''
+    missing_field = _payload(application_id=2)
+    for tradeline in missing_field['credit_bureau_report']['tradeline']:
+        tradeline.pop('delinquencies30Days')
+    no_tradelines = _payload(application_id=3)
+    no_tradelines['credit_bureau_report']['tradeline'] = []
+    payloads = [empty_string, missing_field, no_tradelines]
+
+    rows = _decide(payloads)
+    assert [row['delinquencies_last_30_days'] for row in rows] == [0.0, 0.0, 0.0]
+    _assert_matches_engine(rows, payloads)
+
+
+def test_malformed_rows_get_an_error_instead_of_failing_the_batch(tmp_path):
+    no_risk_model = _payload(application_id=1)
+    no_risk_model['credit_bureau_report']['riskModel'] = []
+    null_risk_score = _payload(application_id=2, risk_score=None)
+    invalid_date = _payload(application_id=3)
+    invalid_date['credit_bureau_report']['consumerIdentity']['date_of_birth'].update({'month': 2, 'day': 31})
+    null_tradelines = _payload(application_id=4)
+    null_tradelines['credit_bureau_report']['tradeline'] = None
+    bad_delinquencies = _payload(application_id=5)
+    bad_delinquencies['credit_bureau_report']['tradeline'][0]['delinquencies30Days'] = 'n/a'
+    no_report = {'application_id': 6, 'credit_bureau_report': None, 'NB36_risk_score': 600}
+    missing_date = _payload(application_id=7)
+    missing_date['credit_bureau_report']['consumerIdentity']['date_of_birth'].pop('day')
+    valid = _payload(application_id=8)
+    payloads = [
+        no_risk_model, null_risk_score, invalid_date, null_tradelines, bad_delinquencies, no_report,
+        missing_date, valid,
+        ]
+
+    input_path, output_path = str(tmp_path / 'applications.parquet'), str(tmp_path / 'decisions.parquet')
+    pq.write_table(columnar_io.applications_to_table(payloads), input_path)
+    assert columnar_io.decide_parquet(input_path=input_path, output_path=output_path, as_of=AS_OF) == 8
+    rows = pq.read_table(output_path).to_pylist()
+
+    assert [row['error'] for row in rows] == [
+        "riskModel.credit_score is missing",
+        "NB36_risk_score is missing",
+        "date_of_birth is not a valid date",
+        "tradeline is missing",
+        "tradeline.delinquencies30Days is not a number",
+        "credit_bureau_report is missing",
+        "date_of_birth is missing",
+        None,
+        ]
+    for row in rows[:-1]:
+        assert row['application_id'] is not None
+        assert row['knockout_result'] is None and row['credit_limit'] is None
+        assert all(row[name] is None for name in FLAG_CHECKS)
+    _assert_matches_engine(rows[-1:], [valid])
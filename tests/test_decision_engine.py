@@ -0,0 +1,147 @@
+import contextlib
+import copy
+import datetime
+import io
+import json
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from decision_engine import FLAG_CHECKS, DecisionEngine, dates_from_parts
+from exploratory_data_analysis import credit_bureau_report, credit_bureau_report2
+from load_test import generate_application
+from submission import run_customer_credit_check
+
+
+def _legacy_decision(payload):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_customer_credit_check(customer_data_dict=payload)
+
+
+def _same_limit(left, right):
+    return (math.isnan(left) and math.isnan(right)) or left == right
+
+
+def _payloads():
+    rng = random.Random(3)
+    payloads = [
+        generate_application(rng=rng, application_id=i, reject_ratio=0.5, tradeline_range=(1, 5))
+        for i in range(300)
+        ]
+    # tradelines missing 'delinquencies30Days', as in the second sample bureau report
+    for payload in payloads[::5]:
+        for tradeline in payload['credit_bureau_report']['tradeline'][1:]:
+            tradeline.pop('delinquencies30Days')
+    for i, report in enumerate([credit_bureau_report, credit_bureau_report2]):
+        for risk_score in [300, 480, 650, 800]:
+            payloads.append({
+                'application_id': 1000 + 10 * i + risk_score,
+                'credit_bureau_report': copy.deepcopy(report),
+                'NB36_risk_score': risk_score,
+                })
+    return payloads
+
+
+@pytest.fixture(scope='module')
+def payloads():
+    return _payloads()
+
+
+def test_sample_report_with_missing_delinquency_fields_is_rejected_by_both_paths():
+    payload = {'application_id': 1, 'credit_bureau_report': copy.deepcopy(credit_bureau_report2), 'NB36_risk_score': 600}
+
+    legacy = _legacy_decision(payload)
+    engine = DecisionEngine(registry=None).decide(payload)
+
+    assert legacy['flag_checks']['has_delinquency_last_30_days'] is True
+    assert legacy['knockout_result'] == engine['knockout_result'] == 'REJECT'
+    assert legacy['check_outcome'] == engine['check_outcome']
+
+
+def test_engine_matches_legacy_decisions(payloads):
+    engine = DecisionEngine(registry=None)
+    for payload in payloads:
+        legacy = _legacy_decision(payload)
+        decision = engine.decide(payload)
+        assert decision['knockout_result'] == legacy['knockout_result']
+        assert decision['flag_checks'] == legacy['flag_checks']
+        assert decision['check_outcome'] == legacy['check_outcome']
+        assert _same_limit(decision['credit_limit'], legacy['credit_limit'])
+
+
+def test_payloads_are_not_mutated(payloads):
+    snapshot = json.dumps(payloads)
+    DecisionEngine(registry=None).decide_batch(payloads)
+    for payload in payloads[:20]:
+        _legacy_decision(payload)
+
+    assert json.dumps(payloads) == snapshot
+
+
+def test_missing_bureau_report_raises():
+    with pytest.raises(ValueError):
+        DecisionEngine(registry=None).decide({'application_id': 1, 'credit_bureau_report': {}, 'NB36_risk_score': 600})
+
+
+def test_invalid_date_of_birth_raises_like_legacy():
+    payload = {'application_id': 1, 'credit_bureau_report': copy.deepcopy(credit_bureau_report), 'NB36_risk_score': 600}
+    payload['credit_bureau_report']['consumerIdentity']['date_of_birth'].update({'year': 1990, 'month': 2, 'day': 31})
+
+    with pytest.raises(ValueError):
+        _legacy_decision(payload)
+    with pytest.raises(ValueError):
+        DecisionEngine(registry=None).decide(payload)
+    with pytest.raises(ValueError):
+        dates_from_parts(years=[1990], months=[2], days=[31])
+    assert np.isnat(dates_from_parts(years=[1990, 1990], months=[2, 13], days=[31, 1], errors='coerce')).all()
+
+
+def test_shared_engine_and_payloads_across_threads(payloads):
+    snapshot = json.dumps(payloads)
+    engine = DecisionEngine(registry=None)
+    serial = [engine.decide(payload) for payload in payloads]
+    serial_legacy = [_legacy_decision(payload) for payload in payloads]
+
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(executor.map(engine.decide, payloads * 3))
+        concurrent_legacy = list(executor.map(
+            lambda payload: run_customer_credit_check(customer_data_dict=payload), payloads * 3
+            ))
+
+    assert json.dumps(payloads) == snapshot
+    for decision, expected in zip(concurrent, serial * 3):
+        assert decision['knockout_result'] == expected['knockout_result']
+        assert decision['check_outcome'] == expected['check_outcome']
+        assert _same_limit(decision['credit_limit'], expected['credit_limit'])
+    for decision, expected in zip(concurrent_legacy, serial_legacy * 3):
+        assert decision['knockout_result'] == expected['knockout_result']
+        assert decision['check_outcome'] == expected['check_outcome']
+        assert _same_limit(decision['credit_limit'], expected['credit_limit'])
+
+
+def test_concurrent_columns_match_single_call():
+    rng = np.random.default_rng(0)
+    num_rows = 10000
+    columns = dict(
+        num_delinquencies=rng.integers(0, 2, num_rows) * rng.integers(0, 2, num_rows),
+        dates_of_birth=dates_from_parts(
+            years=rng.integers(1940, 2015, num_rows), months=rng.integers(1, 13, num_rows),
+            days=rng.integers(1, 29, num_rows),
+            ),
+        credit_scores=rng.integers(300, 950, num_rows),
+        internal_risk_scores=rng.integers(300, 750, num_rows),
+        )
+    engine = DecisionEngine(registry=None)
+    as_of = datetime.date(2026, 10, 19)
+
+    single = engine.decide_columns(**columns, as_of=as_of)
+    concurrent = engine.decide_columns_concurrent(**columns, max_workers=4, chunk_size=999, as_of=as_of)
+
+    assert set(concurrent) == set(single)
+    for name in FLAG_CHECKS + ('age', 'is_accepted'):
+        np.testing.assert_array_equal(concurrent[name], single[name])
+    np.testing.assert_array_equal(concurrent['credit_limit'], single['credit_limit'])
+
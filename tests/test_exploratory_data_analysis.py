@@ -0,0 +1,155 @@
+import datetime
+import gzip
+import json
+import random
+
+import numpy as np
+import pytest
+
+import exploratory_data_analysis as eda
+from load_test import generate_application
+
+AS_OF = datetime.date(2026, 10, 19)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / 'archive.jsonl.gz'
+    with gzip.open(path, 'wt') as f:
+        for i in range(500):
+            f.write(json.dumps(generate_application(rng=rng, application_id=i, reject_ratio=0.3)) + '\n')
+    return str(path)
+
+
+def test_distribution_merge_matches_single_update():
+    values = np.random.default_rng(0).uniform(0, 1200, 1000)
+    whole = eda.DistributionAggregate(bin_edges=eda.SCORE_BIN_EDGES)
+    whole.update(values)
+    merged = eda.DistributionAggregate(bin_edges=eda.SCORE_BIN_EDGES)
+    for chunk in np.array_split(values, 7):
+        part = eda.DistributionAggregate(bin_edges=eda.SCORE_BIN_EDGES)
+        part.update(chunk)
+        merged.merge(part)
+
+    assert merged.counts.tolist() == whole.counts.tolist()
+    assert merged.count == whole.count == 1000
+    assert merged.total == pytest.approx(whole.total)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+
+
+def test_chunk_size_does_not_change_the_aggregate(archive):
+    small_chunks = eda.process_archive(archive, chunk_size=7, as_of=AS_OF).summary()
+    one_chunk = eda.process_archive(archive, chunk_size=10000, as_of=AS_OF).summary()
+
+    assert small_chunks['num_reports'] == one_chunk['num_reports'] == 500
+    for name, metric in one_chunk['metrics'].items():
+        assert small_chunks['metrics'][name]['histogram'] == metric['histogram']
+        assert small_chunks['metrics'][name]['count'] == metric['count']
+
+
+def test_interrupted_run_resumes_to_the_same_aggregate(archive, tmp_path, monkeypatch):
+    uninterrupted = eda.process_archive(archive, chunk_size=60, as_of=AS_OF).to_dict()
+
+    aggregate_chunk = eda.aggregate_chunk
+    calls = []
+
+    def failing_aggregate_chunk(**kwargs):
+        calls.append(1)
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return aggregate_chunk(**kwargs)
+
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    monkeypatch.setattr(eda, 'aggregate_chunk', failing_aggregate_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        eda.process_archive(archive, chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=AS_OF)
+    monkeypatch.setattr(eda, 'aggregate_chunk', aggregate_chunk)
+
+    resumed = eda.process_archive(archive, chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=AS_OF).to_dict()
+    assert resumed == uninterrupted
+
+    # a completed checkpoint is returned without reading the archive again
+    monkeypatch.setattr(eda, 'aggregate_chunk', failing_aggregate_chunk)
+    assert eda.process_archive(archive, chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=AS_OF).to_dict() == resumed
+
+
+def test_bad_records_are_counted_not_raised(tmp_path):
+    bad_tradeline_report = json.loads(json.dumps(eda.credit_bureau_report))
+    bad_tradeline_report['tradeline'].append('not a tradeline')
+    lines = [
+        json.dumps(eda.credit_bureau_report),
+        '[1, 2]',
+        'null',
+        '"x"',
+        '{not json',
+        json.dumps(bad_tradeline_report),
+        json.dumps({'credit_bureau_report': {'consumerIdentity': {}}}),
+        json.dumps(eda.credit_bureau_report2),
+        ]
+    path = tmp_path / 'archive.jsonl'
+    path.write_text('\n'.join(lines) + '\n')
+
+    summary = eda.run_portfolio_analytics(paths=[str(path)], chunk_size=3, as_of=AS_OF)
+    assert summary['num_reports'] == 2
+    assert summary['num_bad_records'] == 6
+    assert summary['num_tradelines'] == 8
+
+
+def test_resume_keeps_the_as_of_of_the_checkpoint(archive, tmp_path, monkeypatch):
+    aggregate_chunk = eda.aggregate_chunk
+    calls = []
+
+    def failing_aggregate_chunk(**kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return aggregate_chunk(**kwargs)
+
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    monkeypatch.setattr(eda, 'aggregate_chunk', failing_aggregate_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        eda.run_portfolio_analytics(paths=[archive], chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=AS_OF)
+    monkeypatch.setattr(eda, 'aggregate_chunk', aggregate_chunk)
+
+    # resumed without as_of (e.g. after midnight): the checkpoint's date is reused, no progress is lost
+    assert eda.checkpoint_as_of(paths=[archive], checkpoint_dir=checkpoint_dir) == AS_OF
+    resumed = eda.run_portfolio_analytics(paths=[archive], chunk_size=60, checkpoint_dir=checkpoint_dir)
+    assert resumed == eda.run_portfolio_analytics(paths=[archive], chunk_size=60, as_of=AS_OF)
+
+
+def test_different_as_of_discards_the_checkpoint_with_a_warning(archive, tmp_path):
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    eda.process_archive(archive, chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=AS_OF)
+
+    later = AS_OF + datetime.timedelta(days=3650)
+    with pytest.warns(UserWarning, match='as_of'):
+        restarted = eda.process_archive(archive, chunk_size=60, checkpoint_dir=checkpoint_dir, as_of=later)
+    assert restarted.to_dict() == eda.process_archive(archive, chunk_size=60, as_of=later).to_dict()
+
+
+def test_split_archive_ranges_match_a_single_process(archive, tmp_path):
+    plain_path = tmp_path / 'archive.jsonl'
+    with gzip.open(archive, 'rb') as f:
+        plain_path.write_bytes(f.read())
+    plain_path = str(plain_path)
+
+    assert eda.split_archive(archive, num_parts=4) == [(0, None)]
+    ranges = eda.split_archive(plain_path, num_parts=4)
+    assert len(ranges) == 4
+    with open(plain_path, 'rb') as f:
+        content = f.read()
+    for start, end in ranges:
+        assert start == 0 or content[start - 1:start] == b'\n'
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges, ranges[1:]))
+
+    single = eda.run_portfolio_analytics(paths=[plain_path], chunk_size=60, as_of=AS_OF)
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+    split = eda.run_portfolio_analytics(
+        paths=[plain_path], chunk_size=60, checkpoint_dir=checkpoint_dir, processes=4, as_of=AS_OF
+        )
+    assert split['num_reports'] == single['num_reports'] == 500
+    for name, metric in single['metrics'].items():
+        assert split['metrics'][name]['histogram'] == metric['histogram']
+        assert split['metrics'][name]['count'] == metric['count']
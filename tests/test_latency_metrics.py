@@ -0,0 +1,101 @@
+import random
+import threading
+
+from latency_metrics import (
+    NUM_BUCKETS,
+    DecisionLatencyRegistry,
+    LatencyHistogram,
+    bucket_index,
+    bucket_upper_bound_ns,
+    record_decision_latency,
+    )
+
+
+def test_bucket_index_bounds_the_value():
+    rng = random.Random(0)
+    for _ in range(10000):
+        value_ns = rng.randint(0, 1 << 40)
+        index = bucket_index(value_ns)
+        lower = bucket_upper_bound_ns(index - 1) if index else 0
+        assert lower <= value_ns < bucket_upper_bound_ns(index)
+
+
+def test_record_matches_bucket_index():
+    histogram = LatencyHistogram()
+    for value_ns in [0, 1023, 1024, 5000, 123456, 10 ** 9, 1 << 40]:
+        histogram.record(value_ns)
+    counts, sum_ns = histogram.snapshot()
+    assert len(counts) == NUM_BUCKETS
+    assert sum_ns == sum([0, 1023, 1024, 5000, 123456, 10 ** 9, 1 << 40])
+    assert counts[bucket_index(123456)] == 1
+    assert counts[NUM_BUCKETS - 1] == 1
+
+
+def test_records_from_many_threads_are_all_counted():
+    histogram = LatencyHistogram()
+
+    def worker():
+        for _ in range(10000):
+            histogram.record(5000)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert histogram.count == 40000
+
+
+def test_reset_keeps_histograms_in_use():
+    registry = DecisionLatencyRegistry()
+    decision = {
+        'knockout_result': 'REJECT',
+        'flag_checks': {'is_under_18': True, 'is_credit_score_fail': False},
+        }
+    registry.record_decision(10 ** 6, decision)
+    registry.reset()
+    assert registry.summary()[('REJECT', 'is_under_18')]['count'] == 0
+
+    # the cached histogram of the decision is still the one exposed after the reset
+    registry.record_decision(10 ** 6, decision)
+    assert registry.summary()[('REJECT', 'is_under_18')]['count'] == 1
+
+
+def test_decorator_labels_outcomes_and_errors():
+    registry = DecisionLatencyRegistry()
+
+    @record_decision_latency(registry=registry)
+    def decide(fail_check):
+        if fail_check is None:
+            raise AssertionError("no report")
+        return {'knockout_result': 'REJECT' if fail_check else 'ACCEPT', 'flag_checks': {'is_under_18': fail_check}}
+
+    decide(False)
+    decide(True)
+    try:
+        decide(None)
+    except AssertionError:
+        pass
+
+    assert set(registry.summary()) == {('ACCEPT', 'none'), ('REJECT', 'is_under_18'), ('ERROR', 'AssertionError')}
+    assert 'outcome="REJECT",knockout="is_under_18",le="+Inf"} 1' in registry.render_prometheus()
+
+
+def test_shards_of_exited_threads_are_folded():
+    registry = DecisionLatencyRegistry()
+    decision = {'knockout_result': 'ACCEPT', 'flag_checks': {'is_under_18': False}}
+
+    def short_lived_request():
+        for _ in range(10):
+            registry.record_decision(5000, decision)
+
+    # one thread per request, as ThreadingHTTPServer does
+    for _ in range(300):
+        thread = threading.Thread(target=short_lived_request)
+        thread.start()
+        thread.join()
+
+    histogram = registry.histogram(outcome='ACCEPT', knockout='none')
+    assert histogram.num_shards <= 2
+    assert histogram.count == 3000
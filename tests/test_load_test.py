@@ -0,0 +1,119 @@
+import contextlib
+import io
+import random
+import threading
+import time
+
+import pytest
+
+from load_test import (
+    _LoadTestRecorder,
+    generate_application,
+    in_process_target,
+    make_http_target,
+    run_closed_loop,
+    run_open_loop,
+    serve_decisions,
+    )
+from submission import run_customer_credit_check
+
+
+def test_forced_knockouts_always_reject():
+    rng = random.Random(1)
+    payloads = [generate_application(rng=rng, application_id=i, reject_ratio=1.0) for i in range(300)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        decisions = [run_customer_credit_check(customer_data_dict=payload) for payload in payloads]
+
+    assert all(decision['knockout_result'] == 'REJECT' for decision in decisions)
+    # each generated rejection fails exactly one knockout check
+    assert all(sum(decision['flag_checks'].values()) == 1 for decision in decisions)
+
+
+def test_accepted_applications_are_inside_the_credit_limit_grid():
+    rng = random.Random(2)
+    payloads = [generate_application(rng=rng, application_id=i, reject_ratio=0.0) for i in range(300)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        decisions = [run_customer_credit_check(customer_data_dict=payload) for payload in payloads]
+
+    assert all(decision['knockout_result'] == 'ACCEPT' for decision in decisions)
+    assert all(decision['credit_limit'] > 0 for decision in decisions)
+
+
+def test_no_tradelines_is_rejected():
+    with pytest.raises(ValueError):
+        generate_application(rng=random.Random(0), application_id=1, tradeline_range=(0, 3))
+
+
+def test_report_quantiles_capped_at_max():
+    recorder = _LoadTestRecorder()
+    for latency_ns in [1000000, 1100000, 14180000]:
+        recorder.histogram.record(latency_ns)
+    recorder.max_latency_ns = 14180000
+
+    latencies = recorder.report(elapsed_seconds=1.0)['latency_seconds']
+    assert latencies['p99.9'] == latencies['max'] == 0.01418
+
+
+def _stub_target(payload):
+    """Accept even application IDs, fail the others with alternating error types"""
+    application_id = payload['application_id']
+    if application_id % 2 == 0:
+        return {'knockout_result': 'ACCEPT'}
+    if application_id % 4 == 1:
+        raise TimeoutError("slow")
+    raise KeyError("bad")
+
+
+def _id_factory():
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            return {'application_id': next(counter)}
+
+    return factory
+
+
+def test_open_loop_issues_rps_times_duration_and_counts_errors_by_type():
+    results = run_open_loop(
+        target=_stub_target, payload_factory=_id_factory(), rps=200, duration_seconds=0.5, max_workers=4
+        )
+
+    assert results['requests'] == 100
+    assert results['outcomes'] == {'ACCEPT': 50}
+    assert results['errors'] == 50
+    assert results['error_types'] == {'TimeoutError': 25, 'KeyError': 25}
+    # the schedule of 100 requests at 200 rps takes about half a second
+    assert 0.45 <= results['elapsed_seconds'] < 2
+
+
+def test_closed_loop_runs_all_clients():
+    seen_threads = set()
+    lock = threading.Lock()
+
+    def target(payload):
+        with lock:
+            seen_threads.add(threading.current_thread().name)
+        time.sleep(0.001)
+        return {'knockout_result': 'REJECT'}
+
+    results = run_closed_loop(target=target, payload_factory=_id_factory(), concurrency=3, duration_seconds=0.3)
+
+    assert seen_threads == {'client-0', 'client-1', 'client-2'}
+    assert results['requests'] == results['outcomes']['REJECT'] > 3
+    assert results['errors'] == 0
+
+
+def test_http_round_trip_matches_in_process_decision():
+    server = serve_decisions(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        payload = generate_application(rng=random.Random(7), application_id=42, reject_ratio=0.5)
+        http_target = make_http_target(url=f'http://127.0.0.1:{server.server_port}/decision')
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert http_target(payload) == in_process_target(payload)
+    finally:
+        server.shutdown()
+        server.server_close()